@@ -28,8 +28,21 @@ import os
 import board
 import digitalio
 import time
-from adafruit_httpserver import Server, Request, Response
+from adafruit_httpserver import Server, Request, Response, ChunkedResponse, Status, GET, HEAD, NO_REQUEST, OK_200, PARTIAL_CONTENT_206, FORBIDDEN_403, NOT_FOUND_404
 import gc # Added for memory management
+import array
+import binascii
+import json
+
+try:
+    import hashlib
+except ImportError:
+    hashlib = None  # Not built into every CircuitPython board - fall back to CRC32
+
+try:
+    import re
+except ImportError:
+    re = None  # Only needed for regular expression searches
 
 # =============================================================================
 # STARTUP LOGGING SYSTEM - Captures everything for standalone debugging
@@ -58,6 +71,107 @@ def decode_html_entities(text):
     text = text.replace('&#39;', "'")
     return text
 
+class _Crc32Hash:
+    """Minimal hashlib-style CRC32 used when hashlib is unavailable."""
+    def __init__(self):
+        self._crc = 0
+
+    def update(self, data):
+        self._crc = binascii.crc32(data, self._crc)
+
+    def digest(self):
+        return self._crc.to_bytes(4, "big")
+
+def new_content_hash():
+    """
+    Create an incremental hash object for file contents.
+    
+    Uses SHA-1 from hashlib when the board provides it, otherwise CRC32.
+    The result only identifies content versions (ETags etc.), it is not
+    used for security.
+    
+    :return: Object with update() and digest() methods
+    :rtype: object
+    """
+    if hashlib is not None:
+        return hashlib.new("sha1")
+    return _Crc32Hash()
+
+# Name of the algorithm behind new_content_hash(), for clients that compare
+# the hashes with their own (the CRC32 digest is big-endian)
+CONTENT_HASH_ALGORITHM = "sha1" if hashlib is not None else "crc32"
+
+def hash_digest_hex(hasher):
+    """
+    Return the hex digest of a hash object created by new_content_hash().
+    
+    :param object hasher: Hash object
+    :return: Lowercase hex string
+    :rtype: str
+    """
+    return binascii.hexlify(hasher.digest()).decode()
+
+def http_date(timestamp):
+    """
+    Format a filesystem timestamp as an HTTP date header value.
+    
+    :param int timestamp: Seconds since the epoch (os.stat()[8])
+    :return: Date such as "Wed, 21 Oct 2015 07:28:00 GMT"
+    :rtype: str
+    """
+    t = time.localtime(timestamp)
+    day = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")[t[6]]
+    month = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")[t[1] - 1]
+    return f"{day}, {t[2]:02d} {month} {t[0]} {t[3]:02d}:{t[4]:02d}:{t[5]:02d} GMT"
+
+def load_optional_setting(user_config, name, cast):
+    """
+    Copy an optional setting from the user config onto the active config.
+    
+    Optional settings were added after the original config.py format, so a
+    missing attribute simply keeps the default instead of counting as an error.
+    
+    :param module user_config: The imported user config module
+    :param str name: Attribute name shared by both configs
+    :param type cast: Conversion applied to the user value (e.g. int, bool)
+    :return: False if the user value was present but invalid, True otherwise
+    :rtype: bool
+    """
+    if not hasattr(user_config, name):
+        return True
+    try:
+        setattr(config, name, cast(getattr(user_config, name)))
+        startup_print(f"Using user {name}: {getattr(config, name)}")
+        return True
+    except Exception as e:
+        startup_print(f"{name} error: {e} - using default")
+        return False
+
+def url_unquote(text, plus_as_space=False):
+    """
+    Decode %XX escapes in a URL path or query string value.
+    
+    adafruit_httpserver hands paths and query parameters over undecoded.
+    
+    :param str text: Percent-encoded text
+    :param bool plus_as_space: Treat '+' as a space (query strings only)
+    :return: Decoded text
+    :rtype: str
+    """
+    if plus_as_space:
+        text = text.replace("+", " ")
+    if "%" not in text:
+        return text
+    parts = text.encode("utf-8").split(b"%")
+    decoded = bytearray(parts[0])
+    for part in parts[1:]:
+        try:
+            decoded.append(int(part[:2], 16))
+            decoded.extend(part[2:])
+        except ValueError:
+            decoded.extend(b"%" + part)  # Not a valid escape - keep as-is
+    return decoded.decode("utf-8")
+
 def validate_wifi_password(password):
     """
     Validate WiFi password meets WPA2 requirements.
@@ -144,6 +258,11 @@ def shut_down_wifi_and_sleep(sleep_duration=None):
     # This function now assumes the caller (check_wifi_timeout or power_save_mode)
     # has determined that a shutdown is needed and not already logged.
     console_print("Initiating Wi-Fi shutdown and power saving mode...")
+    # Nobody can save once the hotspot is gone; make queued saves durable
+    flushed = flush_pending_writes()
+    if flushed:
+        console_print(f"Wrote {flushed} queued file save(s) to flash.")
+    save_hash_index_changes()
     if wifi.radio.enabled: # Only call stop_ap if it's currently enabled
         wifi.radio.stop_ap()
         console_print("Wi-Fi AP shut down.")
@@ -165,6 +284,13 @@ class Config:
     WIFI_PASSWORD = "simpletest"
     WIFI_AP_TIMEOUT_MINUTES = 10
     BLINK_INTERVAL = 0.25
+    SERVE_GZIP = True  # Serve index.html.gz / styles.css.gz when present
+    STATIC_CACHE_BYTES = 16384  # RAM budget for cached asset bodies (0 = hashes only)
+    STREAM_CHUNK_SIZE = 2048  # Size of the shared buffer used to stream files
+    WEB_ROOT = "/"  # Directory served by the generic static file route
+    SERVICE_WORKER = True  # Let browsers cache the IDE shell offline (sw.js)
+    WRITE_BEHIND_SECONDS = 0  # Delay before queued saves reach flash (0 = write immediately)
+    WRITE_BEHIND_BYTES = 16384  # RAM budget for saves waiting to be written
 
 config = Config()
 config_failed = False  # Track if config loading failed
@@ -209,6 +335,22 @@ try:
     except Exception as e:
         startup_print(f"Blink interval error: {e} - using default blink interval")
         config_failed = True
+    
+    # Optional settings - absent from older config.py files
+    if not load_optional_setting(user_config, "SERVE_GZIP", bool):
+        config_failed = True
+    if not load_optional_setting(user_config, "STATIC_CACHE_BYTES", int):
+        config_failed = True
+    if not load_optional_setting(user_config, "STREAM_CHUNK_SIZE", int):
+        config_failed = True
+    if not load_optional_setting(user_config, "WEB_ROOT", str):
+        config_failed = True
+    if not load_optional_setting(user_config, "SERVICE_WORKER", bool):
+        config_failed = True
+    if not load_optional_setting(user_config, "WRITE_BEHIND_SECONDS", float):
+        config_failed = True
+    if not load_optional_setting(user_config, "WRITE_BEHIND_BYTES", int):
+        config_failed = True
         
 except Exception as e:
     startup_print(f"Config import completely failed: {e}")
@@ -247,9 +389,118 @@ ipv4_success = safe_set_ipv4_address()
 if not ipv4_success:
     startup_print("*** IPv4 configuration issues detected ***")
 
+# POST routes whose request body is stored on the drive: their
+# Content-Length is checked against the free space before the body is read
+SPACE_CHECKED_PATHS = ("/save-file", "/upload", "/import", "/create-file")
+
+# POST routes whose bodies are read straight off the socket instead of
+# being buffered whole by the server: path -> required Content-Type prefix
+STREAMING_UPLOAD_PATHS = {
+    "/save-file": "multipart/form-data",
+    "/upload": "",  # Raw file bytes, any type
+    "/import": "",  # A tar or zip archive
+}
+
+class RequestBodyReader:
+    """
+    Reads a request body from the socket on demand.
+    
+    Bytes that arrived together with the headers are returned first, then
+    the rest is received directly into the caller's buffer, never reading
+    past Content-Length.
+    
+    :param socket connection: The client connection
+    :param bytes received: Body bytes already received with the headers
+    :param int content_length: Value of the Content-Length header
+    """
+    def __init__(self, connection, received, content_length):
+        self._connection = connection
+        self._received = received[:content_length]
+        self.remaining = content_length
+
+    def readinto(self, buffer):
+        """
+        Read up to len(buffer) body bytes into buffer.
+        
+        :param buffer: Writable buffer (bytearray or memoryview)
+        :return: Number of bytes read, 0 once the body is exhausted
+        :rtype: int
+        :raises OSError: If the client closes the connection early
+        """
+        if self.remaining <= 0:
+            return 0
+        if self._received:
+            count = min(len(buffer), len(self._received))
+            buffer[:count] = self._received[:count]
+            self._received = self._received[count:]
+        else:
+            count = self._connection.recv_into(buffer, min(len(buffer), self.remaining))
+            if not count:
+                raise OSError("Connection closed before the request body was complete")
+        self.remaining -= count
+        return count
+
+    def drain(self, buffer):
+        """
+        Discard any unread body bytes so the response can be sent cleanly.
+        
+        :param buffer: Scratch buffer to receive into
+        """
+        while self.readinto(buffer):
+            pass
+
+class StreamingServer(Server):
+    """
+    Server that leaves the bodies of STREAMING_UPLOAD_PATHS unread.
+    
+    Those requests get a body_reader attribute (RequestBodyReader) and an
+    empty body, so their handlers can process uploads in fixed-size chunks
+    instead of holding the whole body in RAM several times over.
+    
+    Requests to SPACE_CHECKED_PATHS whose Content-Length does not fit on
+    the drive are answered with 507 Insufficient Storage without reading
+    the body, and without inviting clients that sent "Expect: 100-continue"
+    to send it.
+    """
+    def _receive_request(self, sock, client_address):
+        header_bytes = self._receive_header_bytes(sock)
+        if not header_bytes:
+            return None
+
+        request = Request(self, sock, client_address, header_bytes)
+        content_length = int(request.headers.get_directive("Content-Length", 0))
+        content_type = request.headers.get_directive("Content-Type", "")
+
+        request.space_needed = 0
+        if (request.method == "POST" and request.path in SPACE_CHECKED_PATHS
+                and not has_space_for(content_length)):
+            request.space_needed = content_length
+            request.body_reader = None
+            request.body = b""
+            return request
+
+        streamed_type = STREAMING_UPLOAD_PATHS.get(request.path)
+        if (request.method == "POST" and streamed_type is not None
+                and content_type.startswith(streamed_type)):
+            request.body_reader = RequestBodyReader(sock, request.body, content_length)
+            request.body = b""
+            # Clients that wait for permission to send a large body would
+            # otherwise stall, or give up if the response starts first
+            if request.headers.get_directive("Expect", "").lower() == "100-continue":
+                sock.send(b"HTTP/1.1 100 Continue\r\n\r\n")
+        else:
+            request.body_reader = None
+            request.body = self._receive_body_bytes(sock, request.body, content_length)
+        return request
+
+    def _handle_request(self, request, handler):
+        if request.space_needed:
+            return insufficient_space_response(request, request.space_needed)
+        return super()._handle_request(request, handler)
+
 # Initialize server
 pool = socketpool.SocketPool(wifi.radio)
-server = Server(pool, "/", debug=False)
+server = StreamingServer(pool, "/", debug=False)
 
 # --- NEW/MODIFIED: WiFi Timeout Variables and Activity Tracker ---
 last_activity_time = time.monotonic()
@@ -294,6 +545,699 @@ def check_wifi_timeout():
         console_print("Wi-Fi AP is currently off (and status not yet logged this cycle).")
         ap_is_off_and_logged = True
 
+# =============================================================================
+# STREAMING FILE TRANSFER
+# =============================================================================
+# All file bodies move through this one buffer, allocated once at startup,
+# so peak heap use while serving does not depend on the file size and a
+# fragmented heap cannot fail a large allocation mid-request.
+
+stream_buffer = bytearray(max(256, config.STREAM_CHUNK_SIZE))
+stream_view = memoryview(stream_buffer)
+
+class BufferedFileResponse(Response):
+    """
+    Response that streams a file, or a byte range of it, from stream_buffer.
+    
+    Unlike FileResponse it never allocates per chunk: the file is read with
+    readinto() into the shared buffer and each filled slice is sent directly.
+    Content-Length is known up front, so no chunked encoding is needed.
+    
+    :param Request request: The HTTP request object
+    :param str filename: Path of the file to send
+    :param int offset: First byte to send
+    :param int length: Number of bytes to send (default: to end of file)
+    :param bool head_only: Send headers only (HEAD requests)
+    """
+    def __init__(self, request, filename, *, offset=0, length=None, status=OK_200,
+                 headers=None, content_type=None, head_only=False):
+        super().__init__(request, status=status, headers=headers, content_type=content_type)
+        if length is None:
+            length = os.stat(filename)[6] - offset
+        self._filename = filename
+        self._offset = offset
+        self._length = length
+        self._head_only = head_only
+
+    def _send(self):
+        self._send_headers(self._length, self._content_type)
+        if not self._head_only and self._length > 0:
+            with open(self._filename, "rb") as f:
+                if self._offset:
+                    f.seek(self._offset)
+                remaining = self._length
+                while remaining > 0:
+                    count = f.readinto(stream_view[:min(remaining, len(stream_buffer))])
+                    if not count:
+                        break  # File shrank while sending
+                    self._send_bytes(self._request.connection, stream_view[:count])
+                    remaining -= count
+        self._close_connection()
+
+def hash_file_contents(filename):
+    """
+    Compute the content hash of a file by streaming it through stream_buffer.
+    
+    :param str filename: Path of the file to hash
+    :return: Hex digest from new_content_hash()
+    :rtype: str
+    """
+    hasher = new_content_hash()
+    with open(filename, "rb") as f:
+        while True:
+            count = f.readinto(stream_buffer)
+            if not count:
+                break
+            hasher.update(stream_view[:count])
+    return hash_digest_hex(hasher)
+
+# Content hashes of files: path -> (size, mtime, digest), kept in RAM and
+# persisted in a hidden index file on flash so files are not rehashed after
+# a restart. Entries are checked against os.stat() before use; writers must
+# also call forget_file_caches(), because FAT mtimes only change every two
+# seconds.
+#
+# The index file is a journal: a header line, then one
+# "<digest> <size> <mtime> <path>" line per update ("-" as the digest for a
+# removed entry), later lines replacing earlier ones. Changes are appended
+# from the main loop while idle and the file is compacted at boot.
+HASH_INDEX_FILE = "/.picowide-hashes"
+HASH_INDEX_HEADER = f"picowide-hashes 1 {CONTENT_HASH_ALGORITHM}"
+HASH_INDEX_MAX_ENTRIES = 256
+file_hash_cache = {}
+hash_index_loaded = False
+hash_index_changes = {}  # path -> entry, or None if removed; not yet on flash
+
+def read_hash_index():
+    """
+    Read the hash index file.
+    
+    :return: Tuple of ({path: (size, mtime, digest)}, number of lines);
+        empty if the file is missing, unreadable or for another algorithm
+    :rtype: tuple
+    """
+    entries = {}
+    lines = 0
+    try:
+        with open(HASH_INDEX_FILE, "r") as f:
+            if f.readline().rstrip("\n") != HASH_INDEX_HEADER:
+                return {}, 1
+            for line in f:
+                lines += 1
+                parts = line.rstrip("\n").split(" ", 3)
+                if len(parts) != 4:
+                    continue
+                if parts[0] == "-":
+                    entries.pop(parts[3], None)
+                else:
+                    entries[parts[3]] = (int(parts[1]), int(parts[2]), parts[0])
+    except (OSError, ValueError):
+        pass  # Missing or damaged: start over, the hashes can be recomputed
+    return entries, lines
+
+def load_hash_index():
+    """Merge the index file into file_hash_cache, the first time it is needed."""
+    global hash_index_loaded
+    hash_index_loaded = True
+    entries, _ = read_hash_index()
+    for path, entry in entries.items():
+        if len(file_hash_cache) >= HASH_INDEX_MAX_ENTRIES:
+            break
+        if path not in file_hash_cache and path not in hash_index_changes:
+            file_hash_cache[path] = entry
+
+def get_file_hash(filename, stat=None):
+    """
+    Return the content hash of a file, hashing it only when it changed.
+    
+    :param str filename: Path of the file
+    :param tuple stat: Result of os.stat(filename), if already known
+    :return: Hex digest from new_content_hash()
+    :rtype: str
+    """
+    filename = normalize_path(filename)
+    if stat is None:
+        stat = os.stat(filename)
+    if not hash_index_loaded:
+        load_hash_index()
+    entry = file_hash_cache.get(filename)
+    if entry and entry[0] == stat[6] and entry[1] == stat[8]:
+        return entry[2]
+    digest = hash_file_contents(filename)
+    remember_file_hash(filename, digest)
+    return digest
+
+def remember_file_hash(filename, digest):
+    """
+    Record the hash of a file's current contents, e.g. right after writing it.
+    
+    :param str filename: Path of the file
+    :param str digest: Hex digest of its contents
+    """
+    filename = normalize_path(filename)
+    stat = os.stat(filename)
+    if filename not in file_hash_cache and len(file_hash_cache) >= HASH_INDEX_MAX_ENTRIES:
+        file_hash_cache.pop(next(iter(file_hash_cache)))
+    entry = (stat[6], stat[8], digest)
+    file_hash_cache[filename] = entry
+    hash_index_changes[filename] = entry
+
+def forget_file_hash(filename):
+    """
+    Drop the recorded hash of a file that was changed or removed.
+    
+    :param str filename: Path of the file
+    """
+    filename = normalize_path(filename)
+    if file_hash_cache.pop(filename, None) is not None or not hash_index_loaded:
+        hash_index_changes[filename] = None
+
+def write_hash_index_line(f, path, entry):
+    """
+    Write one journal line of the hash index.
+    
+    :param f: The open index file
+    :param str path: Path of the hashed file
+    :param tuple entry: (size, mtime, digest), or None for a removed entry
+    """
+    if entry is None:
+        f.write(f"- 0 0 {path}\n")
+    else:
+        f.write(f"{entry[2]} {entry[0]} {entry[1]} {path}\n")
+
+def save_hash_index_changes():
+    """
+    Append the hash changes recorded since the last call to the index file.
+    
+    :return: Number of entries written
+    :rtype: int
+    """
+    global hash_index_changes
+    if not hash_index_changes:
+        return 0
+    changes, hash_index_changes = hash_index_changes, {}
+    try:
+        try:
+            os.stat(HASH_INDEX_FILE)
+            new_file = False
+        except OSError:
+            new_file = True
+        with open(HASH_INDEX_FILE, "a") as f:
+            if new_file:
+                f.write(HASH_INDEX_HEADER + "\n")
+            for path, entry in changes.items():
+                write_hash_index_line(f, path, entry)
+        update_dir_index(HASH_INDEX_FILE)
+    except OSError as e:
+        # Read-only while mounted over USB: the hashes stay in RAM only
+        print(f"Could not update {HASH_INDEX_FILE}: {e}")
+        return 0
+    return len(changes)
+
+def compact_hash_index():
+    """
+    Rewrite the hash index with only the entries that are still valid.
+    
+    Replaced and removed entries are dropped, as are files whose size or
+    mtime no longer match (changed over USB). Needs one os.stat() per entry
+    and no file reads; the file is only rewritten if that shrinks it.
+    
+    :return: Number of lines dropped
+    :rtype: int
+    """
+    entries, lines = read_hash_index()
+    live = []
+    for path, entry in entries.items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if stat[6] == entry[0] and stat[8] == entry[1] and len(live) < HASH_INDEX_MAX_ENTRIES:
+            live.append((path, entry))
+    if lines <= len(live):
+        return 0
+    temp_filename = save_file_names(HASH_INDEX_FILE)[0]
+    mark_save_directory(HASH_INDEX_FILE)
+    with open(temp_filename, "w") as f:
+        f.write(HASH_INDEX_HEADER + "\n")
+        for path, entry in live:
+            write_hash_index_line(f, path, entry)
+    sync_filesystem()
+    replace_file(temp_filename, HASH_INDEX_FILE)
+    return lines - len(live)
+
+def copy_file_bytes(source, destination, count, view=stream_view):
+    """
+    Copy bytes between open files through a buffer.
+    
+    :param file source: File to read from, at its current position
+    :param destination: File (or AtomicFileWriter) to write to
+    :param int count: Number of bytes to copy
+    :param memoryview view: Buffer to copy through (default: stream_buffer)
+    :raises OSError: If the source ends early
+    """
+    while count > 0:
+        read = source.readinto(view[:min(count, len(view))])
+        if not read:
+            raise OSError("Unexpected end of file")
+        destination.write(view[:read])
+        count -= read
+
+# Saves write ".picowide-saving-<name>" next to the file, which becomes
+# ".picowide-saved-<name>" once complete and synced, and only then replaces
+# the file. Names starting with ".picowide-" are reserved for Picowide, so
+# these never clash with user files. Before the first save into a directory
+# the directory is recorded in SAVE_MARKER_FILE; at boot only the recorded
+# directories are checked: leftover "saving" files are incomplete and
+# deleted, while "saved" files are finished saves interrupted before the
+# swap and are put in place.
+INTERNAL_FILE_PREFIX = ".picowide-"
+SAVE_TEMP_PREFIX = INTERNAL_FILE_PREFIX + "saving-"
+SAVE_READY_PREFIX = INTERNAL_FILE_PREFIX + "saved-"
+SAVE_MARKER_FILE = "/.picowide-saves"
+save_directories_marked = set()
+
+def is_internal_file(path):
+    """
+    Check whether a file is Picowide's own bookkeeping rather than user data.
+    
+    Interrupted-save temporary files, the save marker and the hash index
+    are left out of listings, exports, imports and manifests.
+    
+    :param str path: Normalised path
+    :rtype: bool
+    """
+    return path.rpartition("/")[2].startswith(INTERNAL_FILE_PREFIX)
+
+def save_file_names(filename):
+    """
+    Return the temporary and ready file names used while saving a file.
+    
+    :param str filename: Normalised path of the file being saved
+    :return: (temporary file, ready file), in the same directory
+    :rtype: tuple
+    """
+    directory, _, name = filename.rpartition("/")
+    return (f"{directory}/{SAVE_TEMP_PREFIX}{name}",
+            f"{directory}/{SAVE_READY_PREFIX}{name}")
+
+def sync_filesystem():
+    """Flush pending filesystem writes to flash, where supported."""
+    if hasattr(os, "sync"):
+        os.sync()
+
+def remove_if_exists(filename):
+    """
+    Delete a file, ignoring the error if it does not exist.
+    
+    :param str filename: Path of the file
+    """
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+def check_save_target(filename):
+    """
+    Make sure a file can be saved before anything is written for it.
+    
+    :param str filename: Normalised path of the file
+    :raises OSError: If the path is a directory, or its directory is missing
+    """
+    try:
+        is_folder = os.stat(filename)[0] & 0x4000
+    except OSError:
+        parent = filename.rpartition("/")[0] or "/"
+        try:
+            parent_is_folder = os.stat(parent)[0] & 0x4000
+        except OSError:
+            parent_is_folder = False
+        if not parent_is_folder:
+            raise OSError(f"Folder '{parent}' does not exist")
+        return  # New file
+    if is_folder:
+        raise OSError(f"'{filename}' is a folder")
+
+def mark_save_directory(filename):
+    """
+    Record a file's directory in SAVE_MARKER_FILE before it is first saved to.
+    
+    Costs one small append per directory until the next boot.
+    
+    :param str filename: Normalised path of the file about to be saved
+    """
+    directory = filename.rpartition("/")[0] or "/"
+    if directory in save_directories_marked:
+        return
+    with open(SAVE_MARKER_FILE, "a") as f:
+        f.write(directory + "\n")
+    sync_filesystem()
+    save_directories_marked.add(directory)
+
+def replace_file(temp_filename, filename):
+    """
+    Move a fully written temporary file over its target.
+    
+    FAT's rename cannot overwrite, so the target is removed first; the
+    ready file step lets recover_interrupted_saves() finish the swap if
+    power is lost in between. If the swap fails while the target is still
+    there, the ready file is removed again.
+    
+    :param str temp_filename: The new contents, already synced
+    :param str filename: The file to replace
+    :raises OSError: If the file cannot be replaced
+    """
+    ready_filename = save_file_names(filename)[1]
+    remove_if_exists(ready_filename)
+    os.rename(temp_filename, ready_filename)
+    try:
+        remove_if_exists(filename)
+        os.rename(ready_filename, filename)
+    except OSError:
+        try:
+            os.stat(filename)
+            remove_if_exists(ready_filename)
+        except OSError:
+            pass  # Target already removed: recovered at the next boot
+        raise
+    sync_filesystem()
+
+def recover_interrupted_saves():
+    """
+    Clean up after saves interrupted by a reset or power loss.
+    
+    Only the directories recorded in SAVE_MARKER_FILE are checked, and the
+    marker is removed afterwards.
+    
+    :return: Number of files recovered or discarded
+    :rtype: int
+    """
+    try:
+        with open(SAVE_MARKER_FILE, "r") as f:
+            directories = set(line.rstrip("\n") for line in f)
+    except OSError:
+        return 0
+    count = 0
+    for directory in directories:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        prefix = directory.rstrip("/") + "/"
+        for name in names:
+            full_path = prefix + name
+            try:
+                if name.startswith(SAVE_TEMP_PREFIX):
+                    os.remove(full_path)
+                    count += 1
+                elif name.startswith(SAVE_READY_PREFIX):
+                    target = prefix + name[len(SAVE_READY_PREFIX):]
+                    try:
+                        check_save_target(target)
+                    except OSError:
+                        os.remove(full_path)
+                        raise
+                    remove_if_exists(target)
+                    os.rename(full_path, target)
+                    startup_print(f"Recovered interrupted save of {target}")
+                    count += 1
+            except OSError as e:
+                startup_print(f"Could not recover {full_path}: {e}")
+    remove_if_exists(SAVE_MARKER_FILE)
+    sync_filesystem()
+    return count
+
+# Second, small buffer for reading the existing file while the incoming
+# data still occupies stream_buffer
+compare_buffer = bytearray(512)
+compare_view = memoryview(compare_buffer)
+
+class AtomicFileWriter:
+    """
+    Writes new contents for a file atomically, and only if they differ.
+    
+    Incoming data is compared with the existing file as it arrives, and
+    nothing is written while it matches. At the first difference the
+    matching prefix is copied into a temporary file and writing continues
+    there; commit() then syncs it and swaps it in with replace_file(). A
+    save with identical contents therefore costs flash reads only, and a
+    reset mid-save never leaves a truncated file.
+    
+    :param str filename: The file to write
+    :raises OSError: If filename is a directory
+    
+    After commit(), digest holds the content hash of the new contents.
+    """
+    def __init__(self, filename):
+        filename = normalize_path(filename)
+        check_save_target(filename)
+        self.filename = filename
+        self.temp_filename = save_file_names(filename)[0]
+        self.digest = None
+        self._hasher = new_content_hash()
+        self._matched = 0
+        self._temp = None
+        try:
+            self._existing = open(filename, "rb")
+        except OSError:
+            self._existing = None
+            mark_save_directory(self.filename)
+            self._temp = open(self.temp_filename, "wb")
+
+    def _diverge(self):
+        """Start the temporary file with the prefix that matched so far."""
+        mark_save_directory(self.filename)
+        self._temp = open(self.temp_filename, "wb")
+        self._existing.seek(0)
+        copy_file_bytes(self._existing, self._temp, self._matched, compare_view)
+
+    def write(self, data):
+        """
+        Add the next piece of the new contents.
+        
+        :param data: Bytes-like object
+        """
+        self._hasher.update(data)
+        if self._temp is None:
+            position = 0
+            while position < len(data):
+                count = self._existing.readinto(compare_view[:min(len(data) - position, len(compare_buffer))])
+                if not count or bytes(compare_view[:count]) != bytes(data[position:position + count]):
+                    self._diverge()
+                    break
+                position += count
+            else:
+                self._matched += len(data)
+                return
+        self._temp.write(data)
+
+    def commit(self):
+        """
+        Finish the save.
+        
+        :return: True if the file was written, False if it was unchanged
+        :rtype: bool
+        """
+        if self._temp is None and self._existing.readinto(compare_view[:1]):
+            self._diverge()  # The new contents are a prefix of the old
+        if self._existing:
+            self._existing.close()
+        self.digest = hash_digest_hex(self._hasher)
+        if self._temp is None:
+            return False
+        self._temp.flush()
+        self._temp.close()
+        self._temp = None
+        sync_filesystem()
+        replace_file(self.temp_filename, self.filename)
+        return True
+
+    def abort(self):
+        """Abandon the save, leaving the original file untouched."""
+        for f in (self._existing, self._temp):
+            if f:
+                f.close()
+        if self._temp:
+            self._temp = None
+            remove_if_exists(self.temp_filename)
+
+# Finish or discard saves cut short by the last reset or power loss
+if recover_interrupted_saves():
+    startup_print("Cleaned up interrupted file saves")
+try:
+    dropped = compact_hash_index()
+    if dropped:
+        startup_print(f"Compacted hash index ({dropped} stale entries)")
+except OSError as e:
+    startup_print(f"Hash index not compacted: {e}")
+
+class MultipartReader:
+    """
+    Incremental multipart/form-data parser reading from a RequestBodyReader.
+    
+    Parts are returned one at a time by next_part(); the current part's data
+    is then read with read() as memoryview slices of the window buffer,
+    which stay valid until the next call. Only the window is ever held in
+    RAM, whatever the size of the body.
+    
+    Field data is returned byte for byte as sent by the browser, so unlike
+    request.form_data no HTML escaping is applied and none has to be undone.
+    
+    :param RequestBodyReader reader: Source of the request body
+    :param str boundary: Boundary from the Content-Type header
+    :param bytearray buffer: Window buffer, at least 128 bytes longer than
+        the delimiter
+    """
+    MAX_HEADER_BYTES = 1024
+
+    def __init__(self, reader, boundary, buffer):
+        self._reader = reader
+        # Every delimiter, including the first, is preceded by CRLF;
+        # priming the window with one makes the first boundary match too
+        self._delimiter = b"\r\n--" + boundary.encode()
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._buffer[0:2] = b"\r\n"
+        self._start = 0
+        self._end = 2
+        self._in_part = False
+        self._finished = False
+
+    def _fill(self):
+        """Compact the window and read more of the body into it."""
+        if self._start:
+            self._buffer[0:self._end - self._start] = self._buffer[self._start:self._end]
+            self._end -= self._start
+            self._start = 0
+        count = self._reader.readinto(self._view[self._end:])
+        self._end += count
+        return count
+
+    def _find(self, needle):
+        return bytes(self._view[self._start:self._end]).find(needle)
+
+    def read(self):
+        """
+        Read the next piece of the current part's data.
+        
+        :return: Data slice, empty once the part is complete
+        :rtype: memoryview
+        :raises ValueError: If the body ends inside the part
+        """
+        if not self._in_part:
+            return self._view[0:0]
+        # Top up the window so each call returns a reasonably large piece
+        if self._end - self._start < len(self._buffer) // 2:
+            self._fill()
+        while True:
+            index = self._find(self._delimiter)
+            if index == 0:
+                self._in_part = False
+                return self._view[0:0]
+            if index == -1:
+                # A delimiter may start in the last len(delimiter) - 1 bytes
+                index = self._end - self._start - len(self._delimiter) + 1
+            if index > 0:
+                data = self._view[self._start:self._start + index]
+                self._start += index
+                return data
+            if not self._fill():
+                raise ValueError("Request body ended inside a form field")
+
+    def skip(self):
+        """Discard the rest of the current part."""
+        while self.read():
+            pass
+
+    def read_value(self, limit=256):
+        """
+        Read the whole current part as a short text value.
+        
+        :param int limit: Maximum length in bytes
+        :return: The value
+        :rtype: str
+        :raises ValueError: If the value is longer than limit
+        """
+        value = b""
+        while True:
+            data = self.read()
+            if not data:
+                return value.decode()
+            value += bytes(data)
+            if len(value) > limit:
+                raise ValueError("Form field too long")
+
+    def next_part(self):
+        """
+        Advance to the next part and parse its headers.
+        
+        :return: Field name and (possibly empty) filename, or None after the
+            final boundary
+        :rtype: tuple
+        :raises ValueError: If the body is not well-formed multipart data
+        """
+        self.skip()
+        if self._finished:
+            return None
+        # The window now starts at a delimiter followed by "--" or CRLF
+        while self._end - self._start < len(self._delimiter) + 2:
+            if not self._fill():
+                raise ValueError("Malformed multipart body")
+        if self._find(self._delimiter) != 0:
+            raise ValueError("Malformed multipart body")
+        self._start += len(self._delimiter)
+        if self._buffer[self._start:self._start + 2] == b"--":
+            self._finished = True
+            return None
+
+        while True:
+            header_end = self._find(b"\r\n\r\n")
+            if header_end != -1:
+                break
+            if self._end - self._start > self.MAX_HEADER_BYTES or not self._fill():
+                raise ValueError("Malformed multipart part headers")
+        headers = bytes(self._view[self._start:self._start + header_end]).decode()
+        self._start += header_end + 4
+        self._in_part = True
+        return parse_content_disposition(headers)
+
+def parse_content_disposition(headers):
+    """
+    Extract the field name and filename from a part's headers.
+    
+    :param str headers: The part's header lines
+    :return: Field name and filename ("" when absent)
+    :rtype: tuple
+    """
+    name = ""
+    filename = ""
+    for line in headers.split("\r\n"):
+        if not line.lower().startswith("content-disposition:"):
+            continue
+        for item in line.split(";")[1:]:
+            key, _, value = item.strip().partition("=")
+            value = value.strip('"')
+            if key == "name":
+                name = value
+            elif key == "filename":
+                filename = value
+    return name, filename
+
+def get_multipart_boundary(request):
+    """
+    Return the boundary parameter of a multipart request's Content-Type.
+    
+    :param Request request: The HTTP request object
+    :return: The boundary, or "" if there is none
+    :rtype: str
+    """
+    content_type = request.headers.get("Content-Type", "")
+    for item in content_type.split(";")[1:]:
+        key, _, value = item.strip().partition("=")
+        if key == "boundary":
+            return value.strip('"')
+    return ""
+
 # =============================================================================
 # BLINKY FUNCTIONALITY SECTION
 # =============================================================================
@@ -379,43 +1323,432 @@ def update_blinky():
 # BASE ROUTES (Core functionality - always needed)
 # =============================================================================
 
-@server.route("/")
-def serve_index(request: Request):
+# Headers sent with precompressed assets. Vary tells caches that the body
+# depends on the Accept-Encoding request header.
+GZIP_HEADERS = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+
+def client_accepts_gzip(request):
     """
-    Serve the main HTML interface.
+    Check whether the browser advertised gzip support.
     
     :param Request request: The HTTP request object
-    :return: HTML response containing the web interface
-    :rtype: Response
+    :return: True if the Accept-Encoding header lists gzip
+    :rtype: bool
     """
-    with open("index.html", "r") as f:
-        return Response(request, f.read(), content_type="text/html")
+    accept_encoding = request.headers.get("Accept-Encoding", "") or ""
+    return "gzip" in accept_encoding.lower()
 
-@server.route("/styles.css")
-def serve_styles(request: Request):
+def find_gzip_variant(request, filename):
     """
-    Serve the CSS stylesheet.
+    Locate a usable precompressed copy of a static asset.
+    
+    The ``.gz`` file is produced on the host by ``tools/build_assets.py``.
+    It is ignored when gzip serving is disabled, when the browser does not
+    accept gzip, or when the plain file is newer (e.g. it was edited through
+    Picowide after the compressed copy was built).
     
     :param Request request: The HTTP request object
-    :return: CSS response containing styling information
-    :rtype: Response
+    :param str filename: Plain asset filename, e.g. "index.html"
+    :return: Path of the ``.gz`` file to serve, or None to serve the plain file
+    :rtype: str or None
     """
-    with open("styles.css", "r") as f:
-        return Response(request, f.read(), content_type="text/css")
+    if not config.SERVE_GZIP or not client_accepts_gzip(request):
+        return None
+    gzip_filename = filename + ".gz"
+    try:
+        gzip_mtime = os.stat(gzip_filename)[8]
+    except OSError:
+        return None
+    try:
+        if os.stat(filename)[8] > gzip_mtime:
+            return None  # Stale - plain file was modified after compression
+    except OSError:
+        pass  # Only the compressed copy exists on the drive
+    return gzip_filename
 
-"""
-Commented out test button code here and in index.html
-"""
-#@server.route("/test", methods=["POST"])
-#def test_button(request: Request):
-#   """
-#   Handle test button functionality to verify connection.
-#    
-#    :param Request request: The HTTP request object
-#   :return: Plain text response confirming functionality
-#   :rtype: Response
-#   """
-#   return Response(request, "Button works!", content_type="text/plain")
+# Statuses not predefined by adafruit_httpserver
+NOT_MODIFIED_304 = Status(304, "Not Modified")
+RANGE_NOT_SATISFIABLE_416 = Status(416, "Range Not Satisfiable")
+CONFLICT_409 = Status(409, "Conflict")
+INSUFFICIENT_STORAGE_507 = Status(507, "Insufficient Storage")
+
+# Extension -> MIME type for the generic static route. Only listed extensions
+# are served, so code.py, config.py (Wi-Fi password) and other sources are
+# never exposed as static files. Add entries here for new asset types.
+STATIC_MIME_TYPES = {
+    ".html": "text/html",
+    ".htm": "text/html",
+    ".css": "text/css",
+    ".js": "text/javascript",
+    ".mjs": "text/javascript",
+    ".json": "application/json",
+    ".webmanifest": "application/manifest+json",
+    ".txt": "text/plain",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".ico": "image/x-icon",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+    ".ttf": "font/ttf",
+    ".otf": "font/otf",
+}
+
+def get_static_mime_type(filename):
+    """
+    Look up the MIME type for a static file by extension.
+    
+    :param str filename: File name or path
+    :return: MIME type, or None if the extension is not servable
+    :rtype: str or None
+    """
+    dot = filename.rfind(".")
+    if dot == -1 or "/" in filename[dot:]:
+        return None
+    return STATIC_MIME_TYPES.get(filename[dot:].lower())
+
+def resolve_web_path(url_path):
+    """
+    Map a request path onto a file below config.WEB_ROOT.
+    
+    :param str url_path: Request path such as "/js/files.js"
+    :return: Filesystem path, or None if the path tries to escape the web root
+    :rtype: str or None
+    """
+    url_path = url_unquote(url_path)
+    if "\\" in url_path:
+        return None
+    parts = [part for part in url_path.split("/") if part]
+    if ".." in parts:
+        return None
+    if url_path.endswith("/"):
+        parts.append("index.html")
+    root = config.WEB_ROOT.rstrip("/")
+    return root + "/" + "/".join(parts)
+
+# Fingerprinted assets (styles.<hash>.css) never change content, so browsers
+# may keep them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# State of asset-manifest.json written by tools/build_assets.py --bundle
+asset_manifest = {"mtime": None, "version": None, "immutable": set()}
+
+def get_asset_manifest():
+    """
+    Return the bundle manifest, reloading it when the file changes.
+    
+    The manifest lists fingerprinted files that may be cached as immutable.
+    Without a manifest (unbundled deployment) nothing is immutable.
+    
+    :return: Dictionary with "version" and the set of "immutable" file paths
+    :rtype: dict
+    """
+    filename = resolve_web_path("/asset-manifest.json")
+    try:
+        mtime = os.stat(filename)[8]
+    except OSError:
+        mtime = None
+    if mtime != asset_manifest["mtime"]:
+        asset_manifest["mtime"] = mtime
+        asset_manifest["version"] = None
+        asset_manifest["immutable"] = set()
+        if mtime is not None:
+            try:
+                with open(filename, "r") as f:
+                    manifest = json.load(f)
+                asset_manifest["version"] = manifest.get("version")
+                asset_manifest["immutable"] = set(resolve_web_path("/" + name) for name in manifest.get("immutable", []))
+            except (OSError, ValueError) as e:
+                console_print(f"Ignoring unreadable asset manifest: {e}")
+    return asset_manifest
+
+# Static asset cache: path -> {"size", "mtime", "etag", "last_modified", "body"}
+# Every served asset keeps its content hash; bodies are kept only while they
+# fit in config.STATIC_CACHE_BYTES so repeat loads skip the flash read.
+static_asset_cache = {}
+static_cache_used = 0
+
+def get_static_asset(filename):
+    """
+    Return cache metadata for a static asset, refreshing it if the file changed.
+    
+    The entry is revalidated against the file's size and mtime on every
+    call, so edits made through Picowide or over USB are picked up. A changed
+    or new file is read once to compute its hash (and, budget permitting,
+    to keep its bytes in RAM).
+    
+    :param str filename: Path of the asset on the filesystem
+    :return: Cache entry dictionary, or None if no such regular file exists
+    :rtype: dict or None
+    """
+    global static_cache_used
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    if stat[0] & 0x4000:
+        return None  # Directory
+    size, mtime = stat[6], stat[8]
+
+    entry = static_asset_cache.get(filename)
+    if entry and entry["size"] == size and entry["mtime"] == mtime:
+        return entry
+
+    # Release the outdated body before deciding whether the new one fits
+    if entry and entry["body"] is not None:
+        static_cache_used -= len(entry["body"])
+    static_asset_cache.pop(filename, None)
+    gc.collect()
+
+    body = None
+    if static_cache_used + size <= config.STATIC_CACHE_BYTES:
+        with open(filename, "rb") as f:
+            body = f.read()
+        hasher = new_content_hash()
+        hasher.update(body)
+        digest = hash_digest_hex(hasher)
+        static_cache_used += len(body)
+    else:
+        digest = hash_file_contents(filename)
+
+    entry = {
+        "size": size,
+        "mtime": mtime,
+        "etag": '"' + digest[:16] + '"',
+        "last_modified": http_date(mtime),
+        "body": body,
+    }
+    static_asset_cache[filename] = entry
+    return entry
+
+def is_not_modified(request, entry):
+    """
+    Check a revalidation request against a cached asset.
+    
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    
+    :param Request request: The HTTP request object
+    :param dict entry: Cache entry from get_static_asset()
+    :return: True if the client's copy is current and a 304 can be sent
+    :rtype: bool
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or entry["etag"] in tags or ("W/" + entry["etag"]) in tags
+    return request.headers.get("If-Modified-Since") == entry["last_modified"]
+
+def parse_byte_range(range_header, size):
+    """
+    Parse a single-range ``Range: bytes=`` header.
+    
+    Supports ``start-end``, ``start-`` and suffix ``-count`` forms. Multiple
+    ranges and other units are ignored, which per RFC 9110 means the full
+    file is sent instead.
+    
+    :param str range_header: Value of the Range header
+    :param int size: Size of the representation in bytes
+    :return: (start, end) inclusive, None to ignore the header, or False if unsatisfiable
+    :rtype: tuple[int, int] or None or bool
+    """
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[6:].strip().partition("-")
+    try:
+        if first == "":
+            count = int(last)
+            if count <= 0 or size == 0:
+                return False  # An empty file has no bytes to select
+            return max(0, size - count), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+def serve_static_file(request, filename):
+    """
+    Serve a file below the web root with caching, gzip, HEAD and Range support.
+    
+    Every response carries ETag / Last-Modified and ``Cache-Control: no-cache``
+    so browsers always revalidate; a matching revalidation gets a bodiless
+    304. Fingerprinted files listed in the asset manifest are sent as
+    immutable instead, so returning clients never ask again. Bodies held in
+    the static asset cache are sent without touching flash, anything else
+    is streamed through the shared buffer. A Range request
+    (optionally guarded by If-Range) gets a 206 partial response so
+    interrupted downloads can resume.
+    
+    :param Request request: The HTTP request object
+    :param str filename: Filesystem path of the plain file
+    :return: 200, 206, 304, 404 or 416 response
+    :rtype: Response
+    """
+    content_type = get_static_mime_type(filename)
+    if content_type is None:
+        return Response(request, "File not found", status=NOT_FOUND_404, content_type="text/plain")
+    flush_pending_writes(filename)  # e.g. index.html saved from the editor
+
+    gzip_filename = find_gzip_variant(request, filename)
+    asset_filename = gzip_filename or filename
+    entry = get_static_asset(asset_filename)
+    if entry is None:
+        return Response(request, "File not found", status=NOT_FOUND_404, content_type="text/plain")
+
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": entry["last_modified"],
+        "Cache-Control": "no-cache",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    if gzip_filename:
+        headers.update(GZIP_HEADERS)
+    if filename in get_asset_manifest()["immutable"]:
+        headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+    if is_not_modified(request, entry):
+        return Response(request, status=NOT_MODIFIED_304, headers=headers)
+
+    size = entry["size"]
+    head_only = request.method == HEAD
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and not head_only:
+        if_range = request.headers.get("If-Range")
+        if if_range is None or if_range in (entry["etag"], entry["last_modified"]):
+            byte_range = parse_byte_range(range_header, size)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(request, status=RANGE_NOT_SATISFIABLE_416, headers=headers)
+
+    status, start, length = OK_200, 0, size
+    if byte_range:
+        status, start, length = PARTIAL_CONTENT_206, byte_range[0], byte_range[1] - byte_range[0] + 1
+        headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+
+    if entry["body"] is not None and not head_only:
+        body = memoryview(entry["body"])[start:start + length]
+        return Response(request, body, status=status, content_type=content_type, headers=headers)
+    return BufferedFileResponse(request, asset_filename, offset=start, length=length, status=status,
+                                content_type=content_type, headers=headers, head_only=head_only)
+
+@server.route("/", [GET, HEAD])
+def serve_index(request: Request):
+    """
+    Serve the main HTML interface.
+    
+    Sends ``index.html.gz`` when the browser accepts gzip and a fresh
+    compressed copy exists, otherwise the plain ``index.html``. Reloads
+    revalidate with ETag and usually cost only a 304. All other assets
+    (``styles.css``, scripts, icons, fonts) go through serve_static_route.
+    
+    :param Request request: The HTTP request object
+    :return: HTML response containing the web interface
+    :rtype: Response
+    """
+    return serve_static_file(request, resolve_web_path("/index.html"))
+
+# App shell cached by the service worker when no bundle manifest exists: the
+# page, its stylesheet and every servable file in the folders the page loads
+# its modules from, so new or renamed modules are picked up automatically.
+# With a manifest, its fingerprinted files replace everything but "/".
+SERVICE_WORKER_SHELL = ["/", "/styles.css"]
+SERVICE_WORKER_MODULE_DIRS = ["/js", "/css"]
+
+def list_service_worker_modules():
+    """
+    List the lazily loaded modules in SERVICE_WORKER_MODULE_DIRS.
+    
+    :return: URL paths, sorted by folder then name
+    :rtype: list[str]
+    """
+    modules = []
+    for url_dir in SERVICE_WORKER_MODULE_DIRS:
+        try:
+            names = sorted(os.listdir(resolve_web_path(url_dir)))
+        except OSError:
+            continue  # Folder not deployed
+        for name in names:
+            if get_static_mime_type(name):  # Skips .gz copies and stray files
+                modules.append(f"{url_dir}/{name}")
+    return modules
+
+# Served instead of sw.js when SERVICE_WORKER is off, so browsers that
+# registered the worker earlier drop it and its cache
+SERVICE_WORKER_REMOVAL = """self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', event => event.waitUntil(
+    caches.keys().then(keys => Promise.all(keys.map(key => caches.delete(key))))
+        .then(() => self.registration.unregister())));
+"""
+
+def get_service_worker_shell():
+    """
+    Work out which URLs the service worker caches and their combined version.
+    
+    A bundle manifest supplies both directly. Otherwise the version is
+    derived from the ETags of the shell files, so editing any of them (even
+    through Picowide itself) rolls out a new worker.
+    
+    :return: Tuple of (version, list of URL paths)
+    :rtype: tuple[str, list[str]]
+    """
+    manifest = get_asset_manifest()
+    if manifest["version"]:
+        root = config.WEB_ROOT.rstrip("/")
+        return manifest["version"], ["/"] + sorted(path[len(root):] for path in manifest["immutable"])
+
+    hasher = new_content_hash()
+    shell = []
+    for url_path in SERVICE_WORKER_SHELL + list_service_worker_modules():
+        entry = get_static_asset(resolve_web_path("/index.html" if url_path == "/" else url_path))
+        if entry is not None:
+            hasher.update(entry["etag"].encode())
+            shell.append(url_path)
+    return hash_digest_hex(hasher)[:12], shell
+
+@server.route("/sw.js", [GET, HEAD])
+def serve_service_worker(request: Request):
+    """
+    Serve the offline app shell service worker.
+    
+    ``sw.js`` is sent with the current shell version and asset list prepended,
+    so its bytes change whenever the shell does and browsers update the
+    worker. Never cached by the browser itself (browsers cap it at 24h anyway).
+    
+    :param Request request: The HTTP request object
+    :return: JavaScript response
+    :rtype: Response
+    """
+    headers = {"Cache-Control": "no-cache"}
+    if not config.SERVICE_WORKER:
+        return Response(request, SERVICE_WORKER_REMOVAL, content_type="text/javascript", headers=headers)
+    try:
+        version, shell = get_service_worker_shell()
+        with open(resolve_web_path("/sw.js"), "r") as f:
+            script = f.read()
+    except OSError:
+        return Response(request, "File not found", status=NOT_FOUND_404, content_type="text/plain")
+    prefix = f"const SHELL_VERSION = {json.dumps(version)};\nconst SHELL_ASSETS = {json.dumps(shell)};\n"
+    return Response(request, prefix + script, content_type="text/javascript", headers=headers)
+
+"""
+Commented out test button code here and in index.html
+"""
+#@server.route("/test", methods=["POST"])
+#def test_button(request: Request):
+#   """
+#   Handle test button functionality to verify connection.
+#    
+#    :param Request request: The HTTP request object
+#   :return: Plain text response confirming functionality
+#   :rtype: Response
+#   """
+#   return Response(request, "Button works!", content_type="text/plain")
 
 @server.route("/run-blinky", methods=["POST"])
 def run_blinky(request: Request):
@@ -481,6 +1814,206 @@ def power_save_mode(request: Request):
 # This section can be removed when creating stripped-down versions for
 # other projects. All file management functionality is contained here.
 
+def normalize_path(filename):
+    """
+    Normalise a path so "code.py", "/code.py" and "lib/" name the same thing.
+    
+    :param str filename: Path of a file or directory
+    :return: Absolute path without a trailing slash ("/" for the root)
+    :rtype: str
+    """
+    return "/" + filename.strip("/")
+
+def split_path(filename):
+    """
+    Split a path into its normalised parent directory and name.
+    
+    :param str filename: Path of a file or directory
+    :return: (parent, name), e.g. ("/lib", "neopixel.mpy")
+    :rtype: tuple
+    """
+    parent, _, name = normalize_path(filename).rpartition("/")
+    return parent or "/", name
+
+def is_directory(path):
+    """
+    Check whether a path names an existing directory.
+    
+    :param str path: Normalised path
+    :rtype: bool
+    """
+    if path == "/":
+        return True
+    try:
+        return bool(os.stat(path)[0] & 0x4000)
+    except OSError:
+        return False
+
+# Drive capacity from os.statvfs(), which can take a while on a large FAT
+# volume: cached for FS_INFO_MAX_AGE seconds, and dropped by
+# forget_file_caches() whenever Picowide changes a file.
+FS_INFO_MAX_AGE = 10
+fs_info = None
+fs_info_checked = 0
+
+def get_fs_info():
+    """
+    Return the capacity of the drive.
+    
+    :return: Dictionary with "total", "used" and "free" bytes, the
+        "block_size" (cluster size) and "largest_file", the biggest file
+        that can still be written: the free space less one cluster for the
+        directory entry
+    :rtype: dict
+    :raises OSError: If the filesystem cannot be queried
+    """
+    global fs_info, fs_info_checked
+    now = time.monotonic()
+    if fs_info is None or now - fs_info_checked > FS_INFO_MAX_AGE:
+        stat = os.statvfs("/")
+        block_size = stat[1] or stat[0]
+        free = stat[4] * block_size
+        fs_info = {
+            "total": stat[2] * block_size,
+            "used": (stat[2] - stat[3]) * block_size,
+            "free": free,
+            "block_size": block_size,
+            "largest_file": max(0, free - block_size),
+        }
+        fs_info_checked = now
+    return fs_info
+
+def has_space_for(size):
+    """
+    Check whether a file of the given size can be written.
+    
+    An atomic save needs this much space in addition to the old version of
+    the file, which is only removed once the new one is complete.
+    
+    :param int size: File size in bytes
+    :return: True if it fits, or if the capacity is unknown
+    :rtype: bool
+    """
+    try:
+        info = get_fs_info()
+    except OSError:
+        return True
+    block_size = info["block_size"]
+    return (size + block_size - 1) // block_size * block_size <= info["largest_file"]
+
+class InsufficientSpaceError(OSError):
+    """
+    Raised when a write would not fit on the drive.
+    
+    :param int size: Bytes that were to be written
+    """
+    def __init__(self, size):
+        super().__init__("Not enough space on the drive")
+        self.size = size
+
+def insufficient_space_response(request, size):
+    """
+    Build the 507 response for a write that does not fit on the drive.
+    
+    :param Request request: The HTTP request object
+    :param int size: Bytes that were to be written
+    :rtype: Response
+    """
+    try:
+        available = get_fs_info()["largest_file"]
+    except OSError:
+        available = 0
+    return Response(request, f"Error: Not enough space on the drive ({size} bytes needed, {available} available)",
+                    status=INSUFFICIENT_STORAGE_507, content_type="text/plain")
+
+# Directory index: path -> {"mtime", "checked", "entries"}, entries being
+# (name, type, size, mtime) tuples sorted by name. Listings are served from
+# here instead of os.listdir() plus one os.stat() per entry. Picowide's own
+# changes update it through forget_file_caches(); changes made over USB are
+# caught by the directory's mtime, and by rebuilding entries older than
+# DIR_INDEX_MAX_AGE seconds where FAT leaves the directory mtime alone.
+dir_index = {}
+dir_index_entries = 0
+DIR_INDEX_MAX_AGE = 30
+DIR_INDEX_MAX_ENTRIES = 512
+
+# Bumped on every change Picowide makes, reported as X-Index-Generation so
+# clients can tell whether a listing they hold is still current
+dir_index_generation = 0
+
+def get_dir_entries(path):
+    """
+    Return the cached entries of a directory, scanning it if needed.
+    
+    :param str path: Directory path
+    :return: (name, type, size, mtime) tuples sorted by name, or None if
+        the directory cannot be read
+    :rtype: list or None
+    """
+    global dir_index_entries
+    path = normalize_path(path)
+    try:
+        directory_mtime = os.stat(path)[8]
+    except OSError:
+        return None
+    now = time.monotonic()
+    cached = dir_index.get(path)
+    if cached and cached["mtime"] == directory_mtime and now - cached["checked"] < DIR_INDEX_MAX_AGE:
+        return cached["entries"]
+
+    try:
+        names = sorted(os.listdir(path))
+    except OSError:
+        return None
+    prefix = path.rstrip("/") + "/"
+    entries = []
+    for name in names:
+        info = get_file_info(prefix + name)
+        if info:
+            entries.append((name, info["type"], info["size"], info["mtime"]))
+
+    if cached:
+        dir_index_entries -= len(cached["entries"])
+        del dir_index[path]
+    while dir_index and dir_index_entries + len(entries) > DIR_INDEX_MAX_ENTRIES:
+        dir_index_entries -= len(dir_index.pop(next(iter(dir_index)))["entries"])
+    if len(entries) <= DIR_INDEX_MAX_ENTRIES:
+        dir_index[path] = {"mtime": directory_mtime, "checked": now, "entries": entries}
+        dir_index_entries += len(entries)
+    return entries
+
+def update_dir_index(filename):
+    """
+    Bring one file's entry in the directory index up to date after a change.
+    
+    Nothing happens if its directory is not cached; it will be scanned on
+    the next listing instead.
+    
+    :param str filename: Path of the file or directory that changed
+    """
+    global dir_index_generation, dir_index_entries
+    dir_index_generation += 1
+    parent, name = split_path(filename)
+    cached = dir_index.get(parent)
+    if not cached:
+        return
+    entries = cached["entries"]
+    position = 0
+    while position < len(entries) and entries[position][0] < name:
+        position += 1
+    if position < len(entries) and entries[position][0] == name:
+        del entries[position]
+        dir_index_entries -= 1
+    info = get_file_info(normalize_path(filename))
+    if info:
+        entries.insert(position, (name, info["type"], info["size"], info["mtime"]))
+        dir_index_entries += 1
+    try:
+        cached["mtime"] = os.stat(parent)[8]  # Our own change, not a USB one
+    except OSError:
+        del dir_index[parent]
+        dir_index_entries -= len(entries)
+
 def list_all_files():
     """
     List all files in the CIRCUITPY root directory.
@@ -497,13 +2030,8 @@ def list_all_files():
         >>> print(files)
         ['code.py', 'index.html', 'styles.css', 'secrets.py']
     """
-    files = []
-    try:
-        for file in os.listdir("/"):
-            files.append(file)
-    except OSError:
-        pass
-    return files
+    entries = get_dir_entries("/") or []
+    return [entry[0] for entry in entries if not entry[0].startswith(INTERNAL_FILE_PREFIX)]
 
 def get_file_info(filename):
     """
@@ -516,18 +2044,236 @@ def get_file_info(filename):
     Example:
         >>> info = get_file_info("code.py")
         >>> print(info)
-        {'name': 'code.py', 'size': 1234, 'type': 'file'}
+        {'name': 'code.py', 'size': 1234, 'type': 'file', 'mtime': 946684800}
     """
     try:
         stat = os.stat(filename)
         return {
             "name": filename,
             "size": stat[6],  # st_size
-            "type": "directory" if stat[0] & 0x4000 else "file"
+            "type": "directory" if stat[0] & 0x4000 else "file",
+            "mtime": stat[8]  # st_mtime
         }
     except OSError:
         return None
 
+# Recursive listings: deepest level walked, and how much output is
+# collected before it is sent as one chunk
+LIST_MAX_DEPTH = 16
+LIST_CHUNK_BYTES = 512
+
+def walk_directory(path, depth, after=None):
+    """
+    Yield get_file_info() for every entry below a directory, in tree order.
+    
+    Entries are sorted by name, each directory immediately followed by its
+    contents, which is the order of comparing paths component by component.
+    Directory entries come from the directory index, so a repeated listing
+    needs one os.stat() per directory, and only the stack of directories
+    being walked is held.
+    
+    :param str path: Directory to walk
+    :param int depth: Levels to descend (1 = only the directory itself)
+    :param str after: Only yield entries after this path (a page cursor);
+        subtrees entirely before it are skipped without being read
+    :return: Generator of file info dictionaries with full paths as names
+    :rtype: generator
+    """
+    path = normalize_path(path)
+    after_parts = normalize_path(after).split("/")[1:] if after else None
+    # One [directory, path components, entries, position] per level
+    stack = [[path, path.split("/")[1:] if path != "/" else [], get_dir_entries(path) or [], 0]]
+    while stack:
+        level = stack[-1]
+        directory, parts, entries, position = level
+        if position >= len(entries):
+            stack.pop()
+            continue
+        level[3] = position + 1
+        name, kind, size, mtime = entries[position]
+        full_path = directory.rstrip("/") + "/" + name
+        descend = kind == "directory" and len(stack) < depth
+
+        if after_parts is not None:
+            entry_parts = parts + [name]
+            if entry_parts == after_parts[:len(entry_parts)]:
+                # The cursor itself, or a directory containing it: not
+                # listed again, but what is below it may still follow
+                if len(entry_parts) == len(after_parts):
+                    after_parts = None
+                if descend:
+                    stack.append([full_path, entry_parts, get_dir_entries(full_path) or [], 0])
+                continue
+            if entry_parts < after_parts:
+                continue  # Before the cursor, along with everything below it
+            after_parts = None  # Tree order: everything from here on is after it
+
+        yield {"name": full_path, "size": size, "type": kind, "mtime": mtime}
+        if descend:
+            stack.append([full_path, parts + [name], get_dir_entries(full_path) or [], 0])
+
+def glob_match(pattern, name):
+    """
+    Match a name against a shell-style pattern with * and ?, ignoring case.
+    
+    :param str pattern: Pattern such as "*.py" or "font_??.bdf"
+    :param str name: Name to test
+    :return: True if the whole name matches
+    :rtype: bool
+    """
+    pattern = pattern.lower()
+    name = name.lower()
+    p = n = 0
+    star = -1
+    mark = 0
+    while n < len(name):
+        if p < len(pattern) and pattern[p] in ("?", name[n]):
+            p += 1
+            n += 1
+        elif p < len(pattern) and pattern[p] == "*":
+            star = p
+            mark = n
+            p += 1
+        elif star != -1:
+            # Let the last * swallow one more character and retry
+            p = star + 1
+            mark += 1
+            n = mark
+        else:
+            return False
+    while p < len(pattern) and pattern[p] == "*":
+        p += 1
+    return p == len(pattern)
+
+def filter_entries(entries, pattern):
+    """
+    Keep listing entries whose name matches a glob or extension filter.
+    
+    :param entries: Iterable of file info dictionaries
+    :param str pattern: Glob such as "*.mpy", or a bare extension such as ".mpy"
+    :return: Generator of the matching entries
+    :rtype: generator
+    """
+    if "*" not in pattern and "?" not in pattern:
+        pattern = "*" + pattern
+    for info in entries:
+        if glob_match(pattern, info["name"].rsplit("/", 1)[-1]):
+            yield info
+
+def page_in_order(entries, limit, page):
+    """
+    Yield up to limit entries, recording the cursor of the next page.
+    
+    :param entries: Iterable of file info dictionaries in tree order
+    :param int limit: Page size
+    :param dict page: Receives "next", the path to continue after, or None
+    :return: Generator of at most limit entries
+    :rtype: generator
+    """
+    page["next"] = None
+    last = None
+    count = 0
+    for info in entries:
+        if count == limit:
+            page["next"] = last  # At least one more entry exists
+            return
+        yield info
+        last = info["name"]
+        count += 1
+
+def page_sorted(entries, sort_key, descending, offset, limit, page):
+    """
+    Yield one page of entries sorted by size or mtime.
+    
+    Only the best offset + limit entries are kept while the tree is walked,
+    so memory follows the page position rather than the number of entries.
+    Ties are broken by path.
+    
+    :param entries: Iterable of file info dictionaries
+    :param str sort_key: "size" or "mtime"
+    :param bool descending: Largest / newest first
+    :param int offset: Entries to skip (the page cursor)
+    :param int limit: Page size, or None for all remaining entries
+    :param dict page: Receives "next", the offset of the next page, or None
+    :return: Generator of the page's entries
+    :rtype: generator
+    """
+    keep = None if limit is None else offset + limit
+    best = []
+    total = 0
+    for info in entries:
+        total += 1
+        value = info[sort_key]
+        key = (-value if descending else value, info["name"])
+        if keep is not None and len(best) >= keep and key >= best[-1][0]:
+            continue
+        position = len(best)
+        while position > 0 and best[position - 1][0] > key:
+            position -= 1
+        best.insert(position, (key, info))
+        if keep is not None and len(best) > keep:
+            best.pop()
+    page["next"] = str(keep) if keep is not None and total > keep else None
+    for item in best[offset:]:
+        yield item[1]
+
+def format_list_record(info, as_json):
+    """
+    Format one listing entry.
+    
+    :param dict info: Entry from get_file_info()
+    :param bool as_json: JSON object instead of a text line
+    :return: The record; text lines are "<d|f> <size> <mtime> <path>"
+    :rtype: str
+    """
+    if as_json:
+        return json.dumps(info)
+    kind = "d" if info["type"] == "directory" else "f"
+    return f"{kind} {info['size']} {info['mtime']} {info['name']}\n"
+
+def stream_listing(request, entries, as_json, page=None, headers=None):
+    """
+    Send listing entries as a chunked response while they are generated.
+    
+    :param Request request: The HTTP request object
+    :param entries: Iterable of get_file_info() dictionaries
+    :param bool as_json: Send JSON instead of text lines
+    :param dict page: For paginated listings, filled in with "next" once
+        entries is exhausted; the cursor is then sent as a final
+        "#next <cursor>" line, or the JSON becomes {"entries": [...],
+        "next": cursor}. A null / absent cursor means the last page.
+    :param dict headers: Extra response headers
+    :return: The streaming response
+    :rtype: ChunkedResponse
+    """
+    def body():
+        chunk = ""
+        if as_json:
+            chunk = '{"entries": [' if page is not None else "["
+        separator = ""
+        for info in entries:
+            chunk += separator + format_list_record(info, as_json)
+            if as_json:
+                separator = ",\n"
+            if len(chunk) >= LIST_CHUNK_BYTES:
+                yield chunk
+                chunk = ""
+        if as_json:
+            chunk += "]"
+            if page is not None:
+                chunk += f', "next": {json.dumps(page["next"])}}}'
+            chunk += "\n"
+        elif page is not None and page["next"] is not None:
+            chunk += f"#next {page['next']}\n"
+        if chunk:
+            yield chunk
+
+    content_type = "application/json" if as_json else "text/plain; charset=utf-8"
+    response_headers = {"X-Index-Generation": dir_index_generation}
+    if headers:
+        response_headers.update(headers)
+    return ChunkedResponse(request, body, content_type=content_type, headers=response_headers)
+
 @server.route("/list-files", methods=["POST"])
 def list_files(request: Request):
     """
@@ -537,18 +2283,79 @@ def list_files(request: Request):
     directory. It formats the response as a plain text list suitable
     for parsing by the JavaScript frontend.
     
+    With any of the form fields below it instead walks a subtree and
+    streams one record per entry, with size, type and mtime, generated
+    while walking so large directories never sit in memory.
+    
     :param Request request: The HTTP request object
     :return: Plain text response with file listing
     :rtype: Response
     
+    Form Data Accepted:
+        - path: Directory to list (default: /)
+        - depth: Directory levels to include (default: 1, max LIST_MAX_DEPTH)
+        - format: "lines" (default) or "json"
+        - filter: Glob matched against entry names ("*.py"), or an
+          extension (".mpy")
+        - sort: "name" (default, tree order), "size", "mtime", "-size" or
+          "-mtime" (largest / newest first)
+        - limit: Page size; the response then ends with the next page's
+          cursor (see stream_listing())
+        - cursor: Cursor from the previous page
+    
     Response Format:
         Files found:
         
         filename1.py
         filename2.html
         filename3.css
+        
+        or, in lines format, "<d|f> <size> <mtime> <path>" per entry:
+        d 0 946684800 /lib
+        f 1234 946684800 /lib/neopixel.mpy
+        
+        or, in json format, an array of get_file_info() objects.
     """
     print("Handling list files request")
+    flush_pending_writes()  # Queued new files should be listed
+    fields = {}
+    for name in ('path', 'depth', 'format', 'limit', 'cursor', 'filter', 'sort'):
+        fields[name] = request.form_data.get(name, '', safe=False)
+    if any(fields.values()):
+        path = fields['path'] or "/"
+        sort_key = fields['sort'] or "name"
+        descending = sort_key.startswith("-")
+        sort_key = sort_key.lstrip("-")
+        try:
+            depth = min(int(fields['depth'] or 1), LIST_MAX_DEPTH)
+            limit = int(fields['limit']) if fields['limit'] else None
+            if limit is not None and limit < 1:
+                raise ValueError("limit must be at least 1")
+            offset = int(fields['cursor'] or 0) if sort_key != "name" else 0
+        except ValueError as e:
+            return Response(request, f"Error: Invalid listing option - {str(e)}", content_type="text/plain")
+        if fields['format'] not in ("", "lines", "json"):
+            return Response(request, f"Error: Unknown format '{fields['format']}'", content_type="text/plain")
+        if sort_key not in ("name", "size", "mtime") or (descending and sort_key == "name"):
+            return Response(request, f"Error: Unknown sort '{fields['sort']}'", content_type="text/plain")
+        info = get_file_info(path)
+        if info is None or info["type"] != "directory":
+            return Response(request, f"Error: '{path}' is not a directory", content_type="text/plain")
+
+        # Name order is the walk order, so a name cursor resumes the walk
+        entries = walk_directory(path, depth, fields['cursor'] if sort_key == "name" else None)
+        entries = (info for info in entries if not is_internal_file(info["name"]))
+        if fields['filter']:
+            entries = filter_entries(entries, fields['filter'])
+        page = None
+        if sort_key != "name":
+            page = {}
+            entries = page_sorted(entries, sort_key, descending, offset, limit, page)
+        elif limit is not None:
+            page = {}
+            entries = page_in_order(entries, limit, page)
+        return stream_listing(request, entries, fields['format'] == "json", page)
+
     all_files = list_all_files()
     
     if all_files:
@@ -586,39 +2393,205 @@ def select_file(request: Request):
         print(f"Error in select_file: {e}")
         return Response(request, f"Error: {str(e)}", content_type="text/plain")
 
+# Line-offset index for paged reads: filename -> {"size", "mtime",
+# "total_lines", "offsets"}. offsets[k] is the byte offset of line
+# k * LINE_INDEX_STRIDE, so any line is at most one stride of scanning away
+# while the index stays small (4 bytes per 64 lines).
+LINE_INDEX_STRIDE = 64
+LINE_INDEX_MAX_FILES = 4
+line_index_cache = {}
+
+def get_line_index(filename, stat):
+    """
+    Return the line-offset index of a file, building it on first use.
+    
+    The index is reused while the file's size and mtime are unchanged.
+    Building it is one streaming pass through stream_buffer.
+    
+    :param str filename: Path of the file
+    :param tuple stat: Result of os.stat(filename)
+    :return: Index dictionary
+    :rtype: dict
+    """
+    size, mtime = stat[6], stat[8]
+    index = line_index_cache.get(filename)
+    if index and index["size"] == size and index["mtime"] == mtime:
+        return index
+
+    offsets = array.array("L", [0])
+    lines = 0
+    offset = 0
+    last_byte = 10
+    with open(filename, "rb") as f:
+        while True:
+            count = f.readinto(stream_buffer)
+            if not count:
+                break
+            chunk = bytes(stream_view[:count])
+            pos = chunk.find(b"\n")
+            while pos != -1:
+                lines += 1
+                if lines % LINE_INDEX_STRIDE == 0:
+                    offsets.append(offset + pos + 1)
+                pos = chunk.find(b"\n", pos + 1)
+            offset += count
+            last_byte = chunk[-1]
+
+    index = {
+        "size": size,
+        "mtime": mtime,
+        # A final line without a trailing newline still counts
+        "total_lines": lines + (1 if last_byte != 10 else 0),
+        "offsets": offsets,
+    }
+    if filename not in line_index_cache and len(line_index_cache) >= LINE_INDEX_MAX_FILES:
+        line_index_cache.pop(next(iter(line_index_cache)))
+    line_index_cache[filename] = index
+    return index
+
+def find_line_offset(f, index, line):
+    """
+    Return the byte offset where a (0-based) line starts.
+    
+    Seeks to the nearest indexed line and scans forward at most
+    LINE_INDEX_STRIDE - 1 newlines.
+    
+    :param file f: The file, opened in binary mode
+    :param dict index: Index from get_line_index()
+    :param int line: Line number, 0-based
+    :return: Byte offset (the file size for lines past the end)
+    :rtype: int
+    """
+    if line >= index["total_lines"]:
+        return index["size"]
+    offset = index["offsets"][line // LINE_INDEX_STRIDE]
+    skip = line % LINE_INDEX_STRIDE
+    f.seek(offset)
+    while skip:
+        count = f.readinto(stream_buffer)
+        if not count:
+            break
+        chunk = bytes(stream_view[:count])
+        pos = 0
+        while skip:
+            newline = chunk.find(b"\n", pos)
+            if newline == -1:
+                break
+            pos = newline + 1
+            skip -= 1
+        if not skip:
+            return offset + pos
+        offset += count
+    return offset
+
+def read_int_field(request, name, default=None):
+    """
+    Read an optional non-negative integer from the request's form data.
+    
+    :param Request request: The HTTP request object
+    :param str name: Field name
+    :param int default: Value when the field is absent or empty
+    :return: The parsed value
+    :rtype: int
+    :raises ValueError: If the value is not a non-negative integer
+    """
+    value = request.form_data.get(name, '')
+    if value == '' or value is None:
+        return default
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"{name} must not be negative")
+    return number
+
+def forget_file_caches(filename):
+    """
+    Drop everything cached about a file after it was written or deleted.
+    
+    Also brings the file's entry in the directory index up to date, so
+    every route that changes files keeps listings current through here.
+    
+    :param str filename: Path of the file
+    """
+    global fs_info
+    line_index_cache.pop(filename, None)
+    forget_file_hash(filename)
+    update_dir_index(filename)
+    fs_info = None
+
 @server.route("/open-file", methods=["POST"])
 def open_file(request: Request):
     """
     Handle file opening requests for editing.
     
-    This route reads the contents of a specified file and returns it
-    for display in the web-based editor. It handles file reading errors
+    This route streams the raw contents of a specified file for display in
+    the web-based editor. The file is sent in chunks through the shared
+    stream buffer, so files larger than the free heap can be opened. Large
+    files can be read a page at a time, either by byte range or by line
+    range; line ranges use a cached line-offset index so reaching line N
+    does not mean scanning from the start. It handles file reading errors
     gracefully and provides appropriate error messages.
     
     :param Request request: The HTTP request object containing form data
-    :return: File contents formatted for editor or error message
+    :return: File contents or error message
     :rtype: Response
     
     Form Data Expected:
         - filename: Name of the file to open
+        - offset, length: Optional byte range to return
+        - start_line, line_count: Optional line range to return (0-based)
         
     Response Format:
-        File: filename.py
-        
-        [file contents here]
+        Body: the requested part of the file, unmodified
+        X-Filename header: name of the opened file (absent on errors)
+        X-File-Size header: total size of the file in bytes
+        X-Offset header: byte offset of the first byte returned
+        X-Total-Lines, X-Start-Line headers: only for line ranges
+        X-Content-Hash header: hash of the whole file, the base version for
+            /patch-file
     """
     try:
         # Get the filename from form data
         filename = request.form_data.get('filename', '')
         if filename:
-            # Read the file content
+            flush_pending_writes(filename)
             try:
-                with open(filename, 'r') as f:
-                    content = f.read()
-                return Response(request, f"File: {filename}\n\n{content}", content_type="text/plain")
+                stat = os.stat(filename)
             except OSError:
                 return Response(request, f"Error: Could not read file '{filename}'", content_type="text/plain")
-        else:
+            if stat[0] & 0x4000:
+                return Response(request, f"Error: '{filename}' is a directory", content_type="text/plain")
+            try:
+                offset = read_int_field(request, 'offset', 0)
+                length = read_int_field(request, 'length')
+                start_line = read_int_field(request, 'start_line')
+                line_count = read_int_field(request, 'line_count')
+            except ValueError as e:
+                return Response(request, f"Error: Invalid range - {str(e)}", content_type="text/plain")
+
+            size = stat[6]
+            headers = {
+                "X-Filename": filename.replace("\r", "").replace("\n", ""),
+                "X-File-Size": size,
+                "X-Content-Hash": get_file_hash(filename, stat),
+            }
+            if start_line is not None:
+                index = get_line_index(filename, stat)
+                with open(filename, "rb") as f:
+                    offset = find_line_offset(f, index, start_line)
+                    if line_count is None:
+                        end = size
+                    else:
+                        end = find_line_offset(f, index, start_line + line_count)
+                length = end - offset
+                headers["X-Total-Lines"] = index["total_lines"]
+                headers["X-Start-Line"] = start_line
+            offset = min(offset, size)
+            if length is None or offset + length > size:
+                length = size - offset
+            headers["X-Offset"] = offset
+            return BufferedFileResponse(request, filename, offset=offset, length=length,
+                                        content_type="text/plain; charset=utf-8", headers=headers)
+        else:
             return Response(request, "No file specified", content_type="text/plain")
     except Exception as e:
         print(f"Error in open_file: {e}")
@@ -701,6 +2674,7 @@ def create_file(request: Request):
             try:
                 with open(filename, 'w') as f:
                     f.write('')  # Create empty file
+                forget_file_caches(filename)
                 return Response(request, f"File '{filename}' created successfully!", content_type="text/plain")
             except OSError as e:
                 return Response(request, f"Error: Could not create file '{filename}' - {str(e)}", content_type="text/plain")
@@ -709,16 +2683,332 @@ def create_file(request: Request):
         print(f"Error in create_file: {e}")
         return Response(request, f"Error: {str(e)}", content_type="text/plain")
 
+# Outcomes of a save, reported back to the client
+SAVE_WRITTEN = "written"
+SAVE_UNCHANGED = "unchanged"
+SAVE_QUEUED = "queued"
+
+def content_digest(data):
+    """
+    Return the content hash of bytes held in RAM.
+    
+    :param bytes data: The contents
+    :return: Hex digest from new_content_hash()
+    :rtype: str
+    """
+    hasher = new_content_hash()
+    hasher.update(data)
+    return hash_digest_hex(hasher)
+
+def save_file_contents(filename, data, digest=None):
+    """
+    Write contents held in RAM now, skipping the write if the file already has them.
+    
+    The hash of data is compared with the cached hash of the existing file
+    first, so an unchanged save usually needs no flash access at all.
+    
+    :param str filename: Path of the file
+    :param bytes data: The new contents
+    :param str digest: content_digest(data), if already known
+    :return: Whether the file was written, and the content hash
+    :rtype: tuple
+    :raises OSError: If the file cannot be written
+    """
+    if digest is None:
+        digest = content_digest(data)
+    try:
+        stat = os.stat(filename)
+        if stat[6] == len(data) and get_file_hash(filename, stat) == digest:
+            return False, digest
+    except OSError:
+        pass  # New file
+    writer = AtomicFileWriter(filename)
+    try:
+        writer.write(data)
+        changed = writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    if changed:
+        forget_file_caches(filename)
+    remember_file_hash(filename, digest)
+    return changed, digest
+
+# Write-behind queue, used when WRITE_BEHIND_SECONDS > 0:
+# path -> [contents, digest, due time, last error]. Saves replace the queued
+# contents of their file, so a burst of autosaves costs one flash write. The
+# main loop writes due entries while no request is waiting; anything that
+# reads files flushes first, and /flush or shutting the hotspot down writes
+# everything. An entry that cannot be written stays queued with its error,
+# is retried one delay later and reported by /flush.
+pending_writes = {}
+pending_write_bytes = 0
+
+def get_pending_write(filename):
+    """
+    Return the queued [contents, digest, due time, last error] of a file,
+    or None.
+    
+    :param str filename: Path of the file
+    :rtype: list or None
+    """
+    return pending_writes.get(normalize_path(filename)) if pending_writes else None
+
+def discard_pending_write(filename):
+    """
+    Drop a file's queued contents without writing them.
+    
+    :param str filename: Path of the file
+    :return: True if contents were queued
+    :rtype: bool
+    """
+    global pending_write_bytes
+    entry = pending_writes.pop(normalize_path(filename), None)
+    if entry:
+        pending_write_bytes -= len(entry[0])
+    return entry is not None
+
+def queue_write(filename, data, digest):
+    """
+    Queue contents to be written later, writing older entries to make room.
+    
+    :param str filename: Path of the file
+    :param bytes data: The new contents
+    :param str digest: content_digest(data)
+    :return: False if data does not fit WRITE_BEHIND_BYTES, even after
+        writing the other entries
+    :rtype: bool
+    :raises OSError: If the file could never be written (see
+        check_save_target()), so the save is not acknowledged
+    """
+    global pending_write_bytes
+    if len(data) > config.WRITE_BEHIND_BYTES:
+        return False
+    key = normalize_path(filename)
+    check_save_target(key)
+    entry = pending_writes.get(key)
+    # A burst of saves is written one delay after its first save
+    due = entry[2] if entry else time.monotonic() + config.WRITE_BEHIND_SECONDS
+    discard_pending_write(key)
+    for other in list(pending_writes):
+        if pending_write_bytes + len(data) <= config.WRITE_BEHIND_BYTES:
+            break
+        flush_pending_writes(other)
+    if pending_write_bytes + len(data) > config.WRITE_BEHIND_BYTES:
+        return False  # Entries that failed to write still take the room
+    pending_writes[key] = [data, digest, due, None]
+    pending_write_bytes += len(data)
+    return True
+
+def flush_pending_writes(filename=None):
+    """
+    Write queued contents to flash now.
+    
+    Entries that fail stay queued with their error (see
+    failed_pending_writes()) and are retried one delay later.
+    
+    :param str filename: Only flush this file (default: all queued files)
+    :return: Number of files flushed
+    :rtype: int
+    """
+    if not pending_writes:
+        return 0
+    keys = [normalize_path(filename)] if filename else list(pending_writes)
+    count = 0
+    for key in keys:
+        entry = pending_writes.get(key)
+        if entry is None:
+            continue
+        try:
+            save_file_contents(key, entry[0], entry[1])
+        except OSError as e:
+            entry[2] = time.monotonic() + config.WRITE_BEHIND_SECONDS
+            entry[3] = str(e)
+            console_print(f"Error: Could not write queued save of {key} - {e}")
+            continue
+        discard_pending_write(key)
+        count += 1
+    return count
+
+def failed_pending_writes():
+    """
+    List queued saves whose last write attempt failed.
+    
+    :return: (path, error message) tuples
+    :rtype: list
+    """
+    return [(key, entry[3]) for key, entry in pending_writes.items() if entry[3]]
+
+def flush_due_writes():
+    """Write queued saves whose delay has passed. Called from the main loop."""
+    if not pending_writes:
+        return
+    now = time.monotonic()
+    for key in list(pending_writes):
+        if pending_writes[key][2] <= now:
+            flush_pending_writes(key)
+
+def store_file_contents(filename, data):
+    """
+    Save contents held in RAM, through the write-behind queue when enabled.
+    
+    :param str filename: Path of the file
+    :param bytes data: The new contents
+    :return: SAVE_WRITTEN, SAVE_UNCHANGED or SAVE_QUEUED, and the content hash
+    :rtype: tuple
+    :raises OSError: If the file has to be written now and cannot be
+    """
+    digest = content_digest(data)
+    if config.WRITE_BEHIND_SECONDS > 0:
+        entry = get_pending_write(filename)
+        if entry and entry[1] == digest:
+            return SAVE_UNCHANGED, digest
+        if not entry:
+            try:
+                stat = os.stat(filename)
+                if stat[6] == len(data) and get_file_hash(filename, stat) == digest:
+                    return SAVE_UNCHANGED, digest
+            except OSError:
+                pass  # New file
+        if queue_write(filename, data, digest):
+            return SAVE_QUEUED, digest
+    discard_pending_write(filename)
+    changed, digest = save_file_contents(filename, data, digest)
+    return (SAVE_WRITTEN if changed else SAVE_UNCHANGED), digest
+
+def store_streamed_content(parts, filename):
+    """
+    Save the current multipart part as the new contents of a file.
+    
+    With write-behind enabled, contents that fit WRITE_BEHIND_BYTES are
+    collected in RAM and queued; anything larger, or everything when
+    write-behind is off, streams through an AtomicFileWriter.
+    
+    :param MultipartReader parts: Reader positioned at the content part
+    :param str filename: Path of the file
+    :return: SAVE_WRITTEN, SAVE_UNCHANGED or SAVE_QUEUED, and the content hash
+    :rtype: tuple
+    :raises OSError: If the file cannot be written
+    :raises ValueError: If the upload is malformed
+    """
+    collected = bytearray() if config.WRITE_BEHIND_SECONDS > 0 else None
+    writer = None
+    try:
+        while True:
+            data = parts.read()
+            if not data:
+                break
+            if collected is not None:
+                if len(collected) + len(data) <= config.WRITE_BEHIND_BYTES:
+                    collected.extend(data)
+                    continue
+                # Too large to hold back: write it now after all
+                writer = AtomicFileWriter(filename)
+                writer.write(collected)
+                collected = None
+            elif writer is None:
+                writer = AtomicFileWriter(filename)
+            writer.write(data)
+        if collected is not None:
+            return store_file_contents(filename, bytes(collected))
+        if writer is None:
+            writer = AtomicFileWriter(filename)  # Empty contents
+        discard_pending_write(filename)
+        changed = writer.commit()
+    except Exception:
+        if writer:
+            writer.abort()
+        raise
+    if changed:
+        forget_file_caches(filename)
+    remember_file_hash(filename, writer.digest)
+    return (SAVE_WRITTEN if changed else SAVE_UNCHANGED), writer.digest
+
+def save_result_response(request, filename, status, digest):
+    """
+    Build the reply to a successful save.
+    
+    :param Request request: The HTTP request object
+    :param str filename: The saved file
+    :param str status: SAVE_WRITTEN, SAVE_UNCHANGED or SAVE_QUEUED
+    :param str digest: Content hash of the saved contents
+    :return: Confirmation with the new X-Content-Hash
+    :rtype: Response
+    """
+    message = f"File '{filename}' saved successfully!"
+    if status == SAVE_UNCHANGED:
+        message += " (unchanged, nothing written)"
+    elif status == SAVE_QUEUED:
+        message += f" (queued, written to flash within {config.WRITE_BEHIND_SECONDS:g}s)"
+    return Response(request, message, content_type="text/plain",
+                    headers={"X-Content-Hash": digest})
+
+def receive_streamed_save(request):
+    """
+    Save an editor upload by parsing its multipart body straight off the socket.
+    
+    The content field is handled as it arrives, one window of stream_buffer
+    at a time, so heap use stays O(chunk) however large the file is (plus
+    the queued contents when write-behind is on). The browser sends the
+    filename field first, as FormData keeps insertion order.
+    
+    :param Request request: The HTTP request object with a body_reader
+    :return: Success confirmation or error message
+    :rtype: Response
+    """
+    reader = request.body_reader
+    boundary = get_multipart_boundary(request)
+    if not boundary:
+        reader.drain(stream_buffer)
+        return Response(request, "Error: Missing multipart boundary", content_type="text/plain")
+
+    parts = MultipartReader(reader, boundary, stream_buffer)
+    filename = ''
+    result = None
+    try:
+        while True:
+            part = parts.next_part()
+            if part is None:
+                break
+            name = part[0]
+            if name == 'filename':
+                filename = parts.read_value()
+            elif name == 'content' and result is None:
+                if not filename:
+                    return Response(request, "No filename specified for saving", content_type="text/plain")
+                try:
+                    result = store_streamed_content(parts, filename)
+                except OSError as e:
+                    return Response(request, f"Error: Could not save file '{filename}' - {str(e)}", content_type="text/plain")
+    except ValueError as e:
+        return Response(request, f"Error: Invalid upload - {str(e)}", content_type="text/plain")
+    finally:
+        reader.drain(stream_buffer)
+
+    if not filename:
+        return Response(request, "No filename specified for saving", content_type="text/plain")
+    if result is None:
+        return Response(request, f"Error: No content received for '{filename}'", content_type="text/plain")
+    return save_result_response(request, filename, *result)
+
 @server.route("/save-file", methods=["POST"])
 def save_file(request: Request):
     """
     Handle file saving requests from the editor.
     
+    Multipart uploads (what the editor sends) are streamed to flash by
+    receive_streamed_save(); other encodings fall back to the buffered
+    form data. Either way the file is replaced atomically, and not written
+    at all if its contents did not change.
+    
     :param Request request: The HTTP request object containing form data
     :return: Success confirmation or error message
     :rtype: Response
     """
     try:
+        if request.body_reader is not None:
+            return receive_streamed_save(request)
+
         filename = request.form_data.get('filename', '')
         content = request.form_data.get('content', '')
         
@@ -727,9 +3017,8 @@ def save_file(request: Request):
         
         if filename:
             try:
-                with open(filename, 'w') as f:
-                    f.write(content)
-                return Response(request, f"File '{filename}' saved successfully!", content_type="text/plain")
+                status, digest = store_file_contents(filename, content.encode())
+                return save_result_response(request, filename, status, digest)
             except OSError as e:
                 return Response(request, f"Error: Could not save file '{filename}' - {str(e)}", content_type="text/plain")
         else:
@@ -738,6 +3027,400 @@ def save_file(request: Request):
         print(f"Error in save_file: {e}")
         return Response(request, f"Error: {str(e)}", content_type="text/plain")
 
+def resolve_patch_edits(size, edits, locate_line):
+    """
+    Convert patch edits to sorted byte ranges of the current contents.
+    
+    Each edit replaces either a byte range (offset, length) or a line range
+    (start_line, line_count, 0-based) with text.
+    
+    :param int size: Size of the current contents
+    :param list edits: Edit dictionaries from the request
+    :param locate_line: Function returning the byte offset of a line
+    :return: (start, end, replacement bytes) tuples in file order
+    :rtype: list
+    :raises ValueError: If an edit is malformed, out of range or overlaps another
+    """
+    ranges = []
+    for edit in edits:
+        text = edit.get("text", "")
+        if not isinstance(text, str):
+            raise ValueError("edit text must be a string")
+        if "start_line" in edit:
+            start_line = int(edit["start_line"])
+            line_count = int(edit.get("line_count", 0))
+            if start_line < 0 or line_count < 0:
+                raise ValueError("line numbers must not be negative")
+            start = locate_line(start_line)
+            end = locate_line(start_line + line_count)
+        else:
+            start = int(edit.get("offset", -1))
+            end = start + int(edit.get("length", 0))
+            if start < 0 or end < start or end > size:
+                raise ValueError("byte range outside the file")
+        ranges.append((start, end, text.encode()))
+    ranges.sort(key=lambda item: item[0])
+    for i in range(1, len(ranges)):
+        if ranges[i][0] < ranges[i - 1][1]:
+            raise ValueError("edits overlap")
+    return ranges
+
+def find_line_offset_in(data, line):
+    """
+    Return the byte offset where a (0-based) line starts in contents held in RAM.
+    
+    :param bytes data: The contents
+    :param int line: Line number, 0-based
+    :return: Byte offset (len(data) for lines past the end)
+    :rtype: int
+    """
+    offset = 0
+    for _ in range(line):
+        newline = data.find(b"\n", offset)
+        if newline == -1:
+            return len(data)
+        offset = newline + 1
+    return offset
+
+@server.route("/patch-file", methods=["POST"])
+def patch_file(request: Request):
+    """
+    Apply small edits to a file without re-uploading all of it.
+    
+    The client sends the edits together with the content hash of the
+    version it edited (X-Content-Hash from /open-file or /save-file). If the
+    file changed since then, nothing is written and 409 Conflict is
+    returned. Otherwise the old file is streamed through an
+    AtomicFileWriter with the edits spliced in, so the upload is
+    proportional to the edit rather than the file. With write-behind on,
+    files within WRITE_BEHIND_BYTES are patched in RAM and queued instead.
+    
+    :param Request request: The HTTP request object with a JSON body
+    :return: Success confirmation or error message
+    :rtype: Response
+    
+    JSON Body Expected:
+        {"filename": "code.py", "base": "<hash>", "edits": [
+            {"offset": 120, "length": 5, "text": "new"},
+            {"start_line": 40, "line_count": 2, "text": "line\\n"}]}
+        
+    Response Format:
+        X-Content-Hash header: hash of the patched file
+    """
+    try:
+        try:
+            patch = request.json()
+        except ValueError:
+            patch = None
+        if not isinstance(patch, dict):
+            return Response(request, "Error: Expected a JSON patch", content_type="text/plain")
+        filename = patch.get("filename", "")
+        edits = patch.get("edits", [])
+        if not filename:
+            return Response(request, "No filename specified for saving", content_type="text/plain")
+        if not isinstance(edits, list):
+            return Response(request, "Error: edits must be a list", content_type="text/plain")
+
+        # Queued contents, if any, are the current version of the file
+        pending = get_pending_write(filename)
+        if pending:
+            size, current = len(pending[0]), pending[1]
+        else:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                return Response(request, f"Error: Could not read file '{filename}'", content_type="text/plain")
+            size, current = stat[6], get_file_hash(filename, stat)
+        if patch.get("base") != current:
+            return Response(request, f"Error: '{filename}' changed since it was opened - reopen it and try again",
+                            status=CONFLICT_409, content_type="text/plain",
+                            headers={"X-Content-Hash": current})
+
+        if config.WRITE_BEHIND_SECONDS > 0 and size <= config.WRITE_BEHIND_BYTES:
+            # Small enough to patch in RAM and hand to the write-behind queue
+            if pending:
+                data = pending[0]
+            else:
+                with open(filename, "rb") as f:
+                    data = f.read()
+            try:
+                ranges = resolve_patch_edits(size, edits, lambda line: find_line_offset_in(data, line))
+            except (ValueError, TypeError, AttributeError) as e:
+                return Response(request, f"Error: Invalid patch - {str(e)}", content_type="text/plain")
+            pieces = []
+            position = 0
+            for start, end, text in ranges:
+                pieces.append(data[position:start])
+                pieces.append(text)
+                position = end
+            pieces.append(data[position:])
+            try:
+                status, digest = store_file_contents(filename, b"".join(pieces))
+            except OSError as e:
+                return Response(request, f"Error: Could not save file '{filename}' - {str(e)}", content_type="text/plain")
+            return save_result_response(request, filename, status, digest)
+
+        writer = None
+        try:
+            try:
+                with open(filename, "rb") as source:
+                    index = None
+                    if any("start_line" in edit for edit in edits if isinstance(edit, dict)):
+                        index = get_line_index(filename, stat)
+                    try:
+                        ranges = resolve_patch_edits(size, edits, lambda line: find_line_offset(source, index, line))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        return Response(request, f"Error: Invalid patch - {str(e)}", content_type="text/plain")
+                    new_size = size + sum(len(text) - (end - start) for start, end, text in ranges)
+                    if not has_space_for(new_size):
+                        return insufficient_space_response(request, new_size)
+                    # Only a patch that will be applied touches flash
+                    writer = AtomicFileWriter(filename)
+                    position = 0
+                    for start, end, text in ranges:
+                        source.seek(position)
+                        copy_file_bytes(source, writer, start - position)
+                        writer.write(text)
+                        position = end
+                    source.seek(position)
+                    copy_file_bytes(source, writer, size - position)
+                changed = writer.commit()
+            except Exception:
+                if writer:
+                    writer.abort()
+                raise
+        except OSError as e:
+            return Response(request, f"Error: Could not save file '{filename}' - {str(e)}", content_type="text/plain")
+
+        if changed:
+            forget_file_caches(filename)
+        remember_file_hash(filename, writer.digest)
+        return save_result_response(request, filename, SAVE_WRITTEN if changed else SAVE_UNCHANGED, writer.digest)
+    except Exception as e:
+        print(f"Error in patch_file: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+def forget_tree_caches(path):
+    """
+    Drop everything cached below a directory that was moved or removed.
+    
+    :param str path: Normalised directory path
+    """
+    global dir_index_entries
+    prefix = path.rstrip("/") + "/"
+    for cached in [p for p in dir_index if p == path or p.startswith(prefix)]:
+        dir_index_entries -= len(dir_index.pop(cached)["entries"])
+    for filename in [f for f in file_hash_cache if f.startswith(prefix)]:
+        forget_file_hash(filename)
+    for filename in [f for f in line_index_cache if normalize_path(f).startswith(prefix)]:
+        del line_index_cache[filename]
+
+def delete_path(path, recursive=False):
+    """
+    Delete a file, or a directory.
+    
+    :param str path: Path to delete
+    :param bool recursive: Also delete a directory's contents; otherwise
+        only empty directories can be deleted
+    :raises OSError: If it does not exist or cannot be deleted
+    :raises ValueError: For the root directory
+    """
+    path = normalize_path(path)
+    if path == "/":
+        raise ValueError("The root folder cannot be deleted")
+    if is_directory(path):
+        if recursive:
+            for _ in remove_unlisted(path, ()):
+                pass
+        os.rmdir(path)
+        forget_tree_caches(path)
+    else:
+        queued = discard_pending_write(path)
+        try:
+            os.remove(path)
+        except OSError:
+            if not queued:
+                raise  # A queued new file never reached flash
+    forget_file_caches(path)
+
+def rename_path(source, destination):
+    """
+    Rename or move a file or directory; never replaces an existing one.
+    
+    :param str source: Existing path
+    :param str destination: New path (its directory must exist)
+    :raises OSError: If source is missing or destination exists
+    :raises ValueError: For the root, or a directory moved into itself
+    """
+    source = normalize_path(source)
+    destination = normalize_path(destination)
+    if source == "/" or destination == "/":
+        raise ValueError("The root folder cannot be renamed")
+    if destination.startswith(source + "/"):
+        raise ValueError("A folder cannot be moved into itself")
+    try:
+        os.stat(destination)
+    except OSError:
+        pass
+    else:
+        raise OSError(f"'{destination}' already exists")
+    is_dir = is_directory(source)
+    flush_pending_writes(None if is_dir else source)
+    known = file_hash_cache.get(source)
+    os.rename(source, destination)
+    if is_dir:
+        forget_tree_caches(source)
+    forget_file_caches(source)
+    forget_file_caches(destination)
+    if known:
+        remember_file_hash(destination, known[2])  # Same contents, same mtime
+
+def path_size(path):
+    """
+    Return the space a copy of a file or directory tree needs.
+    
+    :param str path: Normalised path
+    :return: Total size of the files, in bytes
+    :rtype: int
+    :raises OSError: If path does not exist
+    """
+    if not is_directory(path):
+        return os.stat(path)[6]
+    return sum(info["size"] for info in walk_directory(path, LIST_MAX_DEPTH)
+               if info["type"] == "file" and not is_internal_file(info["name"]))
+
+def copy_file(source, destination):
+    """
+    Copy one file through stream_buffer, without reading it into RAM.
+    
+    The copy goes through an AtomicFileWriter, so an existing destination
+    is replaced atomically, and not written at all if it is identical.
+    
+    :param str source: Normalised path of the file to copy
+    :param str destination: Normalised path of the copy
+    :return: True if destination was written, False if it was identical
+    :rtype: bool
+    """
+    size = os.stat(source)[6]
+    writer = AtomicFileWriter(destination)
+    try:
+        with open(source, "rb") as f:
+            copy_file_bytes(f, writer, size)
+        discard_pending_write(destination)
+        changed = writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    if changed:
+        forget_file_caches(destination)
+    remember_file_hash(destination, writer.digest)
+    return changed
+
+def copy_path(source, destination):
+    """
+    Copy a file, or a directory with everything below it.
+    
+    Files are streamed through stream_buffer (see copy_file()), so nothing
+    is read into RAM whole. A directory is copied to a new directory at
+    destination, or merged into it if it exists.
+    
+    :param str source: File or directory to copy
+    :param str destination: Path of the copy (its parent must exist)
+    :return: Number of files written (identical files are not rewritten)
+    :rtype: int
+    :raises InsufficientSpaceError: If the copy does not fit on the drive
+    :raises OSError: If source is missing or cannot be copied
+    :raises ValueError: If destination is source or inside it
+    """
+    source = normalize_path(source)
+    destination = normalize_path(destination)
+    if source == destination or destination.startswith(source.rstrip("/") + "/"):
+        raise ValueError("Cannot copy onto itself or into itself")
+    if is_directory(source):
+        flush_pending_writes()
+    else:
+        flush_pending_writes(source)
+    size = path_size(source)
+    if not has_space_for(size):
+        raise InsufficientSpaceError(size)
+    if not is_directory(source):
+        return 1 if copy_file(source, destination) else 0
+
+    known = set()
+    make_directories(destination, known)
+    root_length = len(source.rstrip("/"))
+    written = 0
+    for info in walk_directory(source, LIST_MAX_DEPTH):
+        target = destination.rstrip("/") + info["name"][root_length:]
+        if info["type"] == "directory":
+            make_directories(target, known)
+        elif not is_internal_file(info["name"]) and copy_file(info["name"], target):
+            written += 1
+    return written
+
+def create_path(path, content=""):
+    """
+    Create a new file, never replacing an existing one.
+    
+    :param str path: File to create (its directory must exist)
+    :param str content: Initial contents
+    :raises OSError: If the path exists or the file does not fit
+    """
+    path = normalize_path(path)
+    if get_pending_write(path):
+        raise OSError(f"'{path}' already exists")
+    try:
+        os.stat(path)
+    except OSError:
+        pass
+    else:
+        raise OSError(f"'{path}' already exists")
+    data = content.encode()
+    if not has_space_for(len(data)):
+        raise OSError("Not enough space on the drive")
+    writer = AtomicFileWriter(path)
+    try:
+        writer.write(data)
+        writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    forget_file_caches(path)
+    remember_file_hash(path, writer.digest)
+
+def run_batch_operation(operation):
+    """
+    Carry out one /batch operation.
+    
+    :param dict operation: {"op": ..., ...} as documented in batch_files()
+    :return: Short description of what was done
+    :rtype: str
+    :raises OSError: If the filesystem operation fails
+    :raises ValueError: If the operation is invalid
+    :raises KeyError: If a required field is missing
+    """
+    if not isinstance(operation, dict):
+        raise ValueError("Operations must be JSON objects")
+    op = operation.get("op")
+    if op == "delete":
+        delete_path(operation["path"], bool(operation.get("recursive")))
+        return f"deleted {normalize_path(operation['path'])}"
+    if op == "mkdir":
+        path = normalize_path(operation["path"])
+        if not make_directories(path, set()):
+            return f"exists {path}/"
+        return f"created {path}/"
+    if op == "rename":
+        rename_path(operation["from"], operation["to"])
+        return f"renamed {normalize_path(operation['from'])} -> {normalize_path(operation['to'])}"
+    if op == "create":
+        create_path(operation["path"], operation.get("content", ""))
+        return f"created {normalize_path(operation['path'])}"
+    if op == "copy":
+        written = copy_path(operation["from"], operation["to"])
+        return f"copied {normalize_path(operation['from'])} -> {normalize_path(operation['to'])} ({written} file(s) written)"
+    raise ValueError(f"Unknown operation {op!r}")
+
 @server.route("/delete-file", methods=["POST"])
 def delete_file(request: Request):
     """
@@ -754,15 +3437,1119 @@ def delete_file(request: Request):
             return Response(request, "No filename specified", content_type="text/plain")
         
         try:
-            os.remove(filename)
+            delete_path(filename)  # Directories only once they are empty
             return Response(request, f"File '{filename}' deleted successfully!", content_type="text/plain")
-        except OSError as e:
+        except (OSError, ValueError) as e:
             return Response(request, f"Error: Could not delete file '{filename}' - {str(e)}", content_type="text/plain")
             
     except Exception as e:
         print(f"Error in delete_file: {e}")
         return Response(request, f"Error: {str(e)}", content_type="text/plain")
 
+def get_source_and_destination(request):
+    """
+    Read the "from" and "to" form fields of /rename and /copy.
+    
+    :param Request request: The HTTP request object containing form data
+    :return: (source, destination), either of them empty if missing
+    :rtype: tuple
+    """
+    source = request.form_data.get("from", "", safe=False)
+    destination = request.form_data.get("to", "", safe=False)
+    return source, destination
+
+@server.route("/rename", methods=["POST"])
+def rename_file(request: Request):
+    """
+    Rename or move a file or directory on the drive.
+    
+    Uses os.rename(), so even a large directory moves without copying
+    anything. An existing destination is never replaced.
+    
+    :param Request request: The HTTP request object containing form data
+    :return: Success confirmation or error message
+    :rtype: Response
+    
+    Form Data Expected:
+        - from: Existing file or directory
+        - to: New path (its directory must exist)
+    """
+    try:
+        source, destination = get_source_and_destination(request)
+        if not source or not destination:
+            return Response(request, "Error: Both 'from' and 'to' must be specified", content_type="text/plain")
+        try:
+            rename_path(source, destination)
+        except (OSError, ValueError) as e:
+            return Response(request, f"Error: Could not rename '{source}' - {str(e)}", content_type="text/plain")
+        return Response(request, f"Renamed '{source}' to '{destination}'", content_type="text/plain")
+    except Exception as e:
+        print(f"Error in rename_file: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+@server.route("/copy", methods=["POST"])
+def copy_files(request: Request):
+    """
+    Copy a file, or a directory recursively, on the drive.
+    
+    Contents are streamed through stream_buffer from file to file, so a
+    copy never travels over the radio and never needs more RAM than that
+    one buffer. An existing destination file is replaced atomically.
+    
+    :param Request request: The HTTP request object containing form data
+    :return: Success confirmation, 507 if the copy does not fit, or an
+        error message
+    :rtype: Response
+    
+    Form Data Expected:
+        - from: File or directory to copy
+        - to: Path of the copy (its directory must exist)
+    """
+    try:
+        source, destination = get_source_and_destination(request)
+        if not source or not destination:
+            return Response(request, "Error: Both 'from' and 'to' must be specified", content_type="text/plain")
+        try:
+            written = copy_path(source, destination)
+        except InsufficientSpaceError as e:
+            return insufficient_space_response(request, e.size)
+        except (OSError, ValueError) as e:
+            return Response(request, f"Error: Could not copy '{source}' - {str(e)}", content_type="text/plain")
+        return Response(request, f"Copied '{source}' to '{destination}' ({written} file(s) written)", content_type="text/plain")
+    except Exception as e:
+        print(f"Error in copy_files: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+@server.route("/batch", methods=["POST"])
+def batch_files(request: Request):
+    """
+    Run a list of file operations in one request.
+    
+    Operations run in order while the results are streamed back, one line
+    each: "ok <n> <what was done>" or "error <n> <message>", numbered from
+    1, then a "#done <ok> ok, <failed> failed" line (with ", stopped" if
+    stop_on_error ended the batch early).
+    
+    :param Request request: The HTTP request object with a JSON body
+    :return: Chunked plain-text results, or an error message
+    :rtype: Response
+    
+    JSON Body Expected:
+        {"stop_on_error": false, "operations": [
+            {"op": "delete", "path": "/old.py"},
+            {"op": "delete", "path": "/old_lib", "recursive": true},
+            {"op": "mkdir", "path": "/lib/drivers"},
+            {"op": "rename", "from": "/a.py", "to": "/lib/a.py"},
+            {"op": "create", "path": "/notes.txt", "content": "optional"},
+            {"op": "copy", "from": "/code.py", "to": "/code_backup.py"}]}
+    """
+    try:
+        try:
+            batch = request.json()
+        except ValueError:
+            batch = None
+        if not isinstance(batch, dict) or not isinstance(batch.get("operations"), list):
+            return Response(request, "Error: Expected a JSON object with an operations list", content_type="text/plain")
+        operations = batch["operations"]
+        stop_on_error = bool(batch.get("stop_on_error"))
+    except Exception as e:
+        print(f"Error in batch_files: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+    def body():
+        succeeded = failed = 0
+        for number, operation in enumerate(operations, 1):
+            try:
+                result = f"ok {number} {run_batch_operation(operation)}\n"
+                succeeded += 1
+            except KeyError as e:
+                result = f"error {number} Missing field {str(e)}\n"
+                failed += 1
+            except Exception as e:
+                result = f"error {number} {str(e)}\n"
+                failed += 1
+            yield result
+            if failed and stop_on_error:
+                yield f"#done {succeeded} ok, {failed} failed, stopped\n"
+                return
+        yield f"#done {succeeded} ok, {failed} failed\n"
+
+    return ChunkedResponse(request, body, content_type="text/plain; charset=utf-8")
+
+def get_query_value(request, name, default=""):
+    """
+    Return a URL-decoded query string parameter.
+    
+    :param Request request: The HTTP request object
+    :param str name: Parameter name
+    :param str default: Value when the parameter is absent
+    :return: The decoded value, without HTML escaping
+    :rtype: str
+    """
+    value = request.query_params.get(name, None, safe=False)
+    return default if value is None else url_unquote(value, plus_as_space=True)
+
+def get_query_flag(request, name):
+    """
+    Return whether a yes/no query string parameter is set.
+    
+    :param Request request: The HTTP request object
+    :param str name: Parameter name
+    :return: True for "1", "true" or "yes"
+    :rtype: bool
+    """
+    return get_query_value(request, name).lower() in ("1", "true", "yes")
+
+@server.route("/download", [GET, HEAD])
+def download_file(request: Request):
+    """
+    Stream any file, byte for byte, as application/octet-stream.
+    
+    Unlike /open-file this is meant for binary files (.mpy, .bmp, .wav,
+    fonts). The file goes out through stream_buffer with a Content-Length,
+    so heap use does not grow with its size, and Range requests let an
+    interrupted download resume.
+    
+    :param Request request: The HTTP request object
+    :return: 200 or 206 with the file, 404 or 416
+    :rtype: Response
+    
+    Query Parameters:
+        - path: File to download
+    """
+    filename = get_query_value(request, "path")
+    if not filename:
+        return Response(request, "Error: No path specified", status=NOT_FOUND_404, content_type="text/plain")
+    flush_pending_writes(filename)
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        stat = None
+    if stat is None or stat[0] & 0x4000:
+        return Response(request, f"Error: No such file '{filename}'", status=NOT_FOUND_404, content_type="text/plain")
+
+    size = stat[6]
+    last_modified = http_date(stat[8])
+    basename = filename.rsplit("/", 1)[-1].replace('"', "").replace("\r", "").replace("\n", "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{basename}"',
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+    }
+    head_only = request.method == HEAD
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and not head_only:
+        if_range = request.headers.get("If-Range")
+        if if_range is None or if_range == last_modified:
+            byte_range = parse_byte_range(range_header, size)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(request, status=RANGE_NOT_SATISFIABLE_416, headers=headers)
+
+    status, start, length = OK_200, 0, size
+    if byte_range:
+        status, start, length = PARTIAL_CONTENT_206, byte_range[0], byte_range[1] - byte_range[0] + 1
+        headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+    return BufferedFileResponse(request, filename, offset=start, length=length, status=status,
+                                content_type="application/octet-stream", headers=headers,
+                                head_only=head_only)
+
+@server.route("/upload", methods=["POST"])
+def upload_file(request: Request):
+    """
+    Store the raw request body as a file, byte for byte.
+    
+    The body is read off the socket one stream_buffer at a time into an
+    AtomicFileWriter, so any size fits in RAM, binary data is never
+    decoded, and an interrupted upload leaves the old file untouched.
+    
+    :param Request request: The HTTP request object with a body_reader
+    :return: Success confirmation or error message
+    :rtype: Response
+    
+    Query Parameters:
+        - path: File to write (its directory must exist)
+        
+    Response Format:
+        X-Content-Hash header: hash of the uploaded file
+    """
+    reader = request.body_reader
+    try:
+        filename = get_query_value(request, "path")
+        if not filename:
+            return Response(request, "Error: No path specified", content_type="text/plain")
+        try:
+            writer = AtomicFileWriter(filename)
+            try:
+                size = 0
+                while True:
+                    count = reader.readinto(stream_buffer)
+                    if not count:
+                        break
+                    writer.write(stream_view[:count])
+                    size += count
+                discard_pending_write(filename)
+                changed = writer.commit()
+            except Exception:
+                writer.abort()
+                raise
+        except OSError as e:
+            return Response(request, f"Error: Could not upload file '{filename}' - {str(e)}", content_type="text/plain")
+        if changed:
+            forget_file_caches(filename)
+        remember_file_hash(filename, writer.digest)
+        message = f"File '{filename}' uploaded successfully! ({size} bytes)"
+        if not changed:
+            message += " (unchanged, nothing written)"
+        return Response(request, message, content_type="text/plain",
+                        headers={"X-Content-Hash": writer.digest})
+    except Exception as e:
+        print(f"Error in upload_file: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+    finally:
+        reader.drain(stream_buffer)
+
+@server.route("/flush", methods=["POST"])
+def flush_files(request: Request):
+    """
+    Write all queued (write-behind) saves to flash now.
+    
+    :param Request request: The HTTP request object
+    :return: Number of files written, or an error listing the saves that
+        could not be written (they stay queued)
+    :rtype: Response
+    """
+    try:
+        count = flush_pending_writes()
+        failed = failed_pending_writes()
+        if failed:
+            details = "; ".join(f"{key} - {error}" for key, error in failed)
+            return Response(request, f"Error: Could not write {len(failed)} queued file save(s), "
+                            f"{count} flushed: {details}", content_type="text/plain")
+        return Response(request, f"Flushed {count} queued file save(s)", content_type="text/plain")
+    except Exception as e:
+        print(f"Error in flush_files: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+@server.route("/fs-info", [GET])
+def get_filesystem_info(request: Request):
+    """
+    Report the drive's capacity.
+    
+    :param Request request: The HTTP request object
+    :return: JSON object from get_fs_info(): total, used, free, block_size
+        and largest_file, all in bytes
+    :rtype: Response
+    """
+    try:
+        return Response(request, json.dumps(get_fs_info()), content_type="application/json")
+    except Exception as e:
+        print(f"Error in get_filesystem_info: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+TAR_BLOCK_SIZE = 512
+TAR_ZERO_BLOCK = bytes(TAR_BLOCK_SIZE)
+
+def set_tar_octal(header, offset, width, value):
+    """
+    Store a number in a tar header field as zero-padded, NUL-terminated octal.
+    
+    :param bytearray header: The 512-byte header block
+    :param int offset: Field offset
+    :param int width: Field width, including the terminating NUL
+    :param int value: Number to store
+    """
+    digits = "%o" % value
+    header[offset:offset + width - 1] = ("0" * (width - 1 - len(digits)) + digits).encode()
+    header[offset + width - 1] = 0
+
+def fill_tar_header(header, name, kind, size, mtime):
+    """
+    Fill a ustar header block for one archive entry, in place.
+    
+    Names longer than 100 bytes are split at a "/" into the 155-byte prefix
+    field and the name field.
+    
+    :param bytearray header: 512-byte block to overwrite
+    :param str name: Path inside the archive, without a leading "/"
+    :param str kind: "file" or "directory"
+    :param int size: File size in bytes (ignored for directories)
+    :param int mtime: Modification time, seconds since the epoch
+    :return: False if the name does not fit a ustar header
+    :rtype: bool
+    """
+    is_dir = kind == "directory"
+    encoded = (name + "/" if is_dir else name).encode()
+    prefix = b""
+    if len(encoded) > 100:
+        split = encoded.rfind(b"/", 0, len(encoded) - 1)
+        while split > 155:
+            split = encoded.rfind(b"/", 0, split)
+        if split <= 0 or len(encoded) - split - 1 > 100:
+            return False
+        prefix, encoded = encoded[:split], encoded[split + 1:]
+
+    header[:] = TAR_ZERO_BLOCK
+    header[0:len(encoded)] = encoded
+    set_tar_octal(header, 100, 8, 0o755 if is_dir else 0o644)  # mode
+    set_tar_octal(header, 108, 8, 0)  # uid
+    set_tar_octal(header, 116, 8, 0)  # gid
+    set_tar_octal(header, 124, 12, 0 if is_dir else size)
+    set_tar_octal(header, 136, 12, max(0, mtime))
+    header[156] = ord("5") if is_dir else ord("0")  # typeflag
+    header[257:263] = b"ustar\x00"
+    header[263:265] = b"00"
+    header[345:345 + len(prefix)] = prefix
+
+    # The checksum is computed with its own field filled with spaces
+    header[148:156] = b"        "
+    set_tar_octal(header, 148, 7, sum(header))
+    header[155] = ord(" ")
+    return True
+
+def stream_tar_archive(request, path, download_name):
+    """
+    Send a directory tree as a ustar archive, generated while it is sent.
+    
+    Each entry is one header block built in a single preallocated buffer,
+    followed by the file read through stream_buffer and zero padding to the
+    next 512-byte block, so RAM use does not depend on the size of the tree
+    or its files. Entry names are relative to path.
+    
+    :param Request request: The HTTP request object
+    :param str path: Directory to archive
+    :param str download_name: File name offered to the browser
+    :return: The streaming response
+    :rtype: ChunkedResponse
+    """
+    path = normalize_path(path)
+    root_length = len(path.rstrip("/")) + 1
+    header = bytearray(TAR_BLOCK_SIZE)
+    zeros = memoryview(TAR_ZERO_BLOCK)
+
+    def body():
+        for info in walk_directory(path, LIST_MAX_DEPTH):
+            full_path = info["name"]
+            if is_internal_file(full_path):
+                continue
+            if not fill_tar_header(header, full_path[root_length:], info["type"],
+                                   info["size"], info["mtime"]):
+                print(f"Export: skipping '{full_path}', name too long for tar")
+                continue
+            if info["type"] == "directory":
+                yield header
+                continue
+
+            size = info["size"]
+            try:
+                f = open(full_path, "rb")
+            except OSError as e:
+                print(f"Export: skipping '{full_path}' - {e}")
+                continue
+            yield header
+            with f:
+                # Exactly size bytes follow the header, even if the file
+                # changed since it was listed: cut off or zero-filled
+                remaining = size
+                while remaining > 0:
+                    count = f.readinto(stream_view[:min(remaining, len(stream_buffer))])
+                    if not count:
+                        break
+                    yield stream_view[:count]
+                    remaining -= count
+            padding = remaining + (-size) % TAR_BLOCK_SIZE
+            while padding > 0:
+                count = min(padding, TAR_BLOCK_SIZE)
+                yield zeros[:count]
+                padding -= count
+
+        # End of archive: two zero blocks
+        yield TAR_ZERO_BLOCK
+        yield TAR_ZERO_BLOCK
+
+    return ChunkedResponse(request, body, content_type="application/x-tar", headers={
+        "Content-Disposition": f'attachment; filename="{download_name}"',
+    })
+
+@server.route("/export", [GET])
+def export_files(request: Request):
+    """
+    Download a directory tree, or the whole drive, as a tar archive.
+    
+    The archive is streamed with chunked transfer encoding as it is built,
+    so a full backup never needs more than a few buffers of RAM.
+    
+    :param Request request: The HTTP request object
+    :return: The archive (application/x-tar) or an error message
+    :rtype: Response
+    
+    Query Parameters:
+        - path: Directory to export (default: "/", the whole drive)
+    """
+    try:
+        path = normalize_path(get_query_value(request, "path", "/"))
+        if not is_directory(path):
+            return Response(request, f"Error: No such directory '{path}'", status=NOT_FOUND_404, content_type="text/plain")
+        flush_pending_writes()
+        name = path.rsplit("/", 1)[-1] or "picowide-backup"
+        name = name.replace('"', "").replace("\r", "").replace("\n", "")
+        return stream_tar_archive(request, path, name + ".tar")
+    except Exception as e:
+        print(f"Error in export_files: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+def read_exact(reader, view):
+    """
+    Fill a buffer from a RequestBodyReader, unless the body ends first.
+    
+    :param reader: The RequestBodyReader
+    :param memoryview view: Buffer to fill
+    :return: Number of bytes read (less than len(view) at the end of the body)
+    :rtype: int
+    """
+    filled = 0
+    while filled < len(view):
+        count = reader.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+def skip_body_bytes(reader, count):
+    """
+    Read and discard count bytes of a request body.
+    
+    :param reader: The RequestBodyReader
+    :param int count: Number of bytes to skip
+    :raises ValueError: If the body ends first
+    """
+    while count > 0:
+        skipped = reader.readinto(stream_view[:min(count, len(stream_buffer))])
+        if not skipped:
+            raise ValueError("Archive is truncated")
+        count -= skipped
+
+def parse_tar_octal(field):
+    """
+    Read a number from a tar header field (octal, NUL or space terminated).
+    
+    :param field: The field's bytes
+    :rtype: int
+    """
+    digits = bytes(field).split(b"\x00", 1)[0].strip()
+    return int(digits, 8) if digits else 0
+
+def tar_string(field):
+    """
+    Read a NUL-terminated string from a tar header field.
+    
+    :param field: The field's bytes
+    :rtype: str
+    """
+    return bytes(field).split(b"\x00", 1)[0].decode()
+
+def tar_entries(reader, header, received=0):
+    """
+    Parse a tar archive from a request body, one entry at a time.
+    
+    Understands ustar prefixes, GNU long names and the path of pax
+    extended headers. After each entry is yielded the caller must consume
+    exactly its size in data bytes before asking for the next one.
+    
+    :param reader: The RequestBodyReader
+    :param bytearray header: 512-byte buffer for header blocks
+    :param int received: Bytes of the first header already in header
+    :return: Generator of (name, kind, size, crc) tuples, kind being
+        "file", "directory" or "skip"; crc is always None
+    :rtype: generator
+    :raises ValueError: If the data is not a valid tar archive
+    """
+    view = memoryview(header)
+    long_name = None
+    while True:
+        if read_exact(reader, view[received:]) < TAR_BLOCK_SIZE - received:
+            raise ValueError("Archive is truncated")
+        received = 0
+        if header == TAR_ZERO_BLOCK:
+            return  # End-of-archive marker
+
+        try:
+            stored_checksum = parse_tar_octal(view[148:156])
+        except ValueError:
+            stored_checksum = -1
+        header[148:156] = b"        "
+        if sum(header) != stored_checksum:
+            raise ValueError("Not a tar or zip archive (bad header checksum)")
+
+        size = parse_tar_octal(view[124:136])
+        typeflag = chr(header[156])
+        padding = (-size) % TAR_BLOCK_SIZE
+        if typeflag in "Lx" and size <= len(stream_buffer):
+            # The next entry's full name is in this entry's data
+            read_exact(reader, stream_view[:size])
+            data = bytes(stream_view[:size])
+            if typeflag == "L":
+                long_name = data.split(b"\x00", 1)[0].decode()
+            else:
+                for record in data.decode().split("\n"):
+                    key, _, value = record.partition(" ")[2].partition("=")
+                    if key == "path":
+                        long_name = value
+            skip_body_bytes(reader, padding)
+            continue
+        if typeflag in "gLx":
+            skip_body_bytes(reader, size + padding)
+            continue
+
+        name = tar_string(view[0:100])
+        if header[257:262] == b"ustar" and header[345]:
+            name = tar_string(view[345:500]) + "/" + name
+        if long_name is not None:
+            name, long_name = long_name, None
+
+        if typeflag == "5" or name.endswith("/"):
+            kind = "directory"
+        elif typeflag in "0\x007":
+            kind = "file"
+        else:
+            kind = "skip"  # Links, devices and the like
+        yield name, kind, size, None
+        skip_body_bytes(reader, padding)
+
+def zip_entries(reader, header, received=0):
+    """
+    Parse a zip archive from a request body, one entry at a time.
+    
+    Only the local file headers are read, so the archive is processed
+    front to back without the central directory. Entries need their sizes
+    in the local header (no data descriptors), as written by "zip" or
+    Python's zipfile for ordinary files. After each entry is yielded the
+    caller must consume exactly its size in data bytes.
+    
+    :param reader: The RequestBodyReader
+    :param bytearray header: 512-byte buffer for header blocks
+    :param int received: Bytes of the first header already in header
+    :return: Generator of (name, kind, size, crc) tuples, kind being
+        "file", "directory" or "skip" (compressed entries)
+    :rtype: generator
+    :raises ValueError: If the data is not a supported zip archive
+    """
+    view = memoryview(header)
+    while True:
+        if received < 4 and read_exact(reader, view[received:4]) < 4 - received:
+            return  # No central directory; treat the end of the data as the end
+        received = 0
+        signature = header[0:4]
+        if signature in (b"PK\x01\x02", b"PK\x05\x06"):
+            return  # Central directory: all entries have been read
+        if signature != b"PK\x03\x04" or read_exact(reader, view[4:30]) < 26:
+            raise ValueError("Not a valid zip archive")
+
+        flags = int.from_bytes(header[6:8], "little")
+        method = int.from_bytes(header[8:10], "little")
+        crc = int.from_bytes(header[14:18], "little")
+        size = int.from_bytes(header[18:22], "little")
+        name_length = int.from_bytes(header[26:28], "little")
+        extra_length = int.from_bytes(header[28:30], "little")
+        if flags & 0x08:
+            raise ValueError("Zip entries with data descriptors are not supported; create the archive from files, e.g. with 'zip -0'")
+        if name_length > TAR_BLOCK_SIZE - 30 or read_exact(reader, view[30:30 + name_length]) < name_length:
+            raise ValueError("Not a valid zip archive")
+        name = bytes(view[30:30 + name_length]).decode()
+        skip_body_bytes(reader, extra_length)
+
+        if name.endswith("/"):
+            kind = "directory"
+        elif method == 0:
+            kind = "file"
+        else:
+            kind = "skip"  # Compressed: there is no RAM to inflate into
+        yield name, kind, size, crc
+
+def archive_target(root, name):
+    """
+    Map an archive entry name to a path below the import directory.
+    
+    :param str root: Normalised import directory
+    :param str name: Entry name from the archive
+    :return: The full path, or None for names that must not be extracted
+        (".." components, Picowide's internal files)
+    :rtype: str or None
+    """
+    parts = []
+    for part in name.replace("\\", "/").split("/"):
+        if part == "..":
+            return None
+        if part and part != ".":
+            parts.append(part)
+    target = normalize_path(root + "/" + "/".join(parts))
+    if is_internal_file(target):
+        return None
+    return target
+
+def make_directories(path, known):
+    """
+    Create a directory and any missing parents.
+    
+    :param str path: Normalised directory path
+    :param set known: Directories known to exist; updated
+    :return: True if path itself was created
+    :rtype: bool
+    :raises OSError: If a file is in the way
+    """
+    if path == "/" or path in known:
+        return False
+    make_directories(split_path(path)[0], known)
+    created = False
+    try:
+        os.mkdir(path)
+        created = True
+        forget_file_caches(path)
+    except OSError:
+        if not os.stat(path)[0] & 0x4000:
+            raise OSError(f"'{path}' exists and is not a directory")
+    known.add(path)
+    return created
+
+def import_file(reader, writer, size, crc=None):
+    """
+    Write the next size bytes of a request body to a file, atomically.
+    
+    :param reader: The RequestBodyReader
+    :param AtomicFileWriter writer: Writer for the destination file
+    :param int size: Number of bytes
+    :param int crc: Expected CRC32 of the data (zip entries), or None
+    :return: True if written, False if the file already had this content
+    :rtype: bool
+    :raises ValueError: If the data is cut short or fails its CRC check
+    """
+    filename = writer.filename
+    try:
+        check = 0
+        remaining = size
+        while remaining > 0:
+            count = reader.readinto(stream_view[:min(remaining, len(stream_buffer))])
+            if not count:
+                raise ValueError("Archive is truncated")
+            writer.write(stream_view[:count])
+            if crc is not None:
+                check = binascii.crc32(stream_view[:count], check)
+            remaining -= count
+        if crc is not None and check & 0xFFFFFFFF != crc:
+            raise ValueError(f"CRC mismatch in '{filename}'")
+        discard_pending_write(filename)
+        changed = writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    if changed:
+        forget_file_caches(filename)
+    remember_file_hash(filename, writer.digest)
+    return changed
+
+def remove_unlisted(path, keep):
+    """
+    Delete everything below a directory that is not in keep.
+    
+    :param str path: Directory to clean up
+    :param set keep: Full paths to keep, including their parent directories;
+        the hash index and save marker are always kept
+    :return: Generator of removed paths
+    :rtype: generator
+    """
+    keep_always = (HASH_INDEX_FILE, SAVE_MARKER_FILE)
+    doomed = [(info["name"], info["type"]) for info in walk_directory(path, LIST_MAX_DEPTH)
+              if info["name"] not in keep and info["name"] not in keep_always]
+    # Tree order lists a directory before its contents: remove in reverse
+    for full_path, kind in reversed(doomed):
+        if kind == "directory":
+            os.rmdir(full_path)
+        else:
+            discard_pending_write(full_path)
+            os.remove(full_path)
+        forget_file_caches(full_path)
+        yield full_path
+
+@server.route("/import", methods=["POST"])
+def import_files(request: Request):
+    """
+    Extract an uploaded tar or zip archive into a directory.
+    
+    The archive is parsed as the body arrives: each entry is written
+    through an AtomicFileWriter in stream_buffer-sized pieces, so archives
+    of any size fit in RAM and files with unchanged contents cost no flash
+    writes. Zip archives must be stored (uncompressed); compressed entries
+    are skipped. Progress is streamed back as one line per entry:
+        wrote <path> (<size> bytes) / unchanged <path> / created <dir>/
+        skipped <name> - <reason> / removed <path>
+    followed by a summary line, or a line starting with "Error:".
+    
+    :param Request request: The HTTP request object with a body_reader
+    :return: Chunked plain-text progress report
+    :rtype: Response
+    
+    Query Parameters:
+        - path: Directory to extract into (default: "/")
+        - replace: "1" to also delete files and folders below path that
+          are not in the archive, once it was extracted without errors
+    """
+    reader = request.body_reader
+    try:
+        path = normalize_path(get_query_value(request, "path", "/"))
+        replace = get_query_flag(request, "replace")
+        if not is_directory(path):
+            reader.drain(stream_buffer)
+            return Response(request, f"Error: No such directory '{path}'", status=NOT_FOUND_404, content_type="text/plain")
+        flush_pending_writes()
+    except Exception as e:
+        print(f"Error in import_files: {e}")
+        reader.drain(stream_buffer)
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+    def body():
+        header = bytearray(TAR_BLOCK_SIZE)
+        known = {path}  # Everything extracted, with its parent directories
+        written = unchanged = created = skipped = removed = 0
+        try:
+            received = read_exact(reader, memoryview(header)[:4])
+            if not received:
+                raise ValueError("The upload is empty")
+            if header[:4] == b"PK\x03\x04":
+                entries = zip_entries(reader, header, received)
+            else:
+                entries = tar_entries(reader, header, received)
+
+            for name, kind, size, crc in entries:
+                target = archive_target(path, name)
+                if target is None or kind == "skip":
+                    skip_body_bytes(reader, size)
+                    skipped += 1
+                    yield f"skipped {name} - {'unsafe name' if target is None else 'not a plain file or folder, or compressed'}\n"
+                    continue
+                try:
+                    if kind == "directory":
+                        if make_directories(target, known):
+                            created += 1
+                            yield f"created {target}/\n"
+                        continue
+                    make_directories(split_path(target)[0], known)
+                    known.add(target)
+                    writer = AtomicFileWriter(target)
+                except OSError as e:
+                    known.add(target)  # Kept as it is, even in replace mode
+                    # Nothing of the entry's data was read yet: skip it and
+                    # carry on with the rest of the archive
+                    skip_body_bytes(reader, size if kind == "file" else 0)
+                    skipped += 1
+                    yield f"skipped {target} - {str(e)}\n"
+                    continue
+                if import_file(reader, writer, size, crc):
+                    written += 1
+                    yield f"wrote {target} ({size} bytes)\n"
+                else:
+                    unchanged += 1
+                    yield f"unchanged {target}\n"
+
+            if replace:
+                for full_path in remove_unlisted(path, known):
+                    removed += 1
+                    yield f"removed {full_path}\n"
+            yield (f"Imported into {path}: {written} written, {unchanged} unchanged, "
+                   f"{created} folder(s) created, {skipped} skipped, {removed} removed\n")
+        except (OSError, ValueError) as e:
+            print(f"Error in import_files: {e}")
+            yield f"Error: {str(e)}\n"
+        finally:
+            reader.drain(stream_buffer)
+
+    return ChunkedResponse(request, body, content_type="text/plain; charset=utf-8")
+
+def manifest_entries(path):
+    """
+    Yield the entries below a directory with the content hash of each file.
+    
+    :param str path: Directory to walk
+    :return: Generator of get_file_info() dictionaries, files with a "hash"
+    :rtype: generator
+    """
+    for info in walk_directory(path, LIST_MAX_DEPTH):
+        name = info["name"]
+        if is_internal_file(name):
+            continue
+        if info["type"] == "file":
+            try:
+                info["hash"] = get_file_hash(name)
+            except OSError:
+                continue  # Removed while walking
+        yield info
+
+@server.route("/manifest", [GET])
+def get_manifest(request: Request):
+    """
+    List every file below a directory with its size, mtime and content hash.
+    
+    A sync client compares this with its local copy to find the files that
+    changed, without downloading anything. Hashes come from get_file_hash(),
+    so they are computed when first asked for and cached while the file is
+    unchanged.
+    
+    :param Request request: The HTTP request object
+    :return: Chunked JSON array of {"name", "size", "type", "mtime"[, "hash"]}
+        objects in tree order, directories included
+    :rtype: Response
+    
+    Query Parameters:
+        - path: Directory to describe (default: "/")
+        
+    Response Format:
+        X-Content-Hash-Algorithm header: "sha1" or "crc32"
+    """
+    try:
+        path = normalize_path(get_query_value(request, "path", "/"))
+        if not is_directory(path):
+            return Response(request, f"Error: No such directory '{path}'", status=NOT_FOUND_404, content_type="text/plain")
+        flush_pending_writes()
+        return stream_listing(request, manifest_entries(path), True,
+                              headers={"X-Content-Hash-Algorithm": CONTENT_HASH_ALGORITHM})
+    except Exception as e:
+        print(f"Error in get_manifest: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+SEARCH_DEFAULT_RESULTS = 100
+SEARCH_MAX_RESULTS = 1000
+SEARCH_MAX_QUERY = 128
+SEARCH_LINE_BYTES = 200
+
+class SearchPattern:
+    """
+    What /search looks for: a literal string, or a regular expression.
+    
+    Literal searches work on raw bytes and test each chunk as a whole
+    before splitting it into lines, so chunks without a match cost a single
+    substring search.
+    
+    :param str query: The text or expression to find
+    :param bool regex: Treat query as a regular expression ("re" module)
+    :param bool ignore_case: Match regardless of case
+    :raises ValueError: If the expression cannot be used on this board
+    
+    overlap is the number of bytes a match can extend past a chunk boundary
+    within a line too long to hold whole.
+    """
+    def __init__(self, query, regex=False, ignore_case=False):
+        self.ignore_case = ignore_case
+        self.overlap = min(len(query.encode()), SEARCH_MAX_QUERY) - 1
+        self._needle = None
+        self._regex = None
+        if regex:
+            if re is None:
+                raise ValueError("Regular expressions are not available on this board")
+            if ignore_case:
+                if not hasattr(re, "IGNORECASE"):
+                    raise ValueError("Case-insensitive regular expressions are not available on this board")
+                self._regex = re.compile(query, re.IGNORECASE)
+            else:
+                self._regex = re.compile(query)
+        else:
+            needle = query.encode()
+            self._needle = needle.lower() if ignore_case else needle
+
+    def could_match(self, data):
+        """
+        Quick test of a whole chunk.
+        
+        :param bytes data: Chunk of file contents
+        :return: False if no line in data can match
+        :rtype: bool
+        """
+        if self._needle is None:
+            return True
+        return self._needle in (data.lower() if self.ignore_case else data)
+
+    def matches(self, line):
+        """
+        Test one line.
+        
+        :param bytes line: The line, without its newline
+        :rtype: bool
+        """
+        if self._regex is not None:
+            try:
+                return self._regex.search(line.decode()) is not None
+            except UnicodeError:
+                return False
+        return self._needle in (line.lower() if self.ignore_case else line)
+
+def search_file(filename, pattern):
+    """
+    Yield the matching lines of a file, read in stream_buffer-sized chunks.
+    
+    A partial line at the end of a chunk is carried over to the start of
+    the buffer and completed by the next read. A line longer than half the
+    buffer is tested piece by piece, keeping pattern.overlap bytes between
+    pieces so a match across the boundary is still found, and reported
+    once. Files with a NUL byte in their first chunk are taken for binary
+    and skipped.
+    
+    :param str filename: Path of the file
+    :param SearchPattern pattern: What to look for
+    :return: Generator of (line number, line bytes) tuples; the bytes of a
+        very long line are only the piece that matched
+    :rtype: generator
+    """
+    half = len(stream_buffer) // 2
+    line_number = 1
+    kept = 0  # Bytes of an unfinished line at the start of stream_buffer
+    reported = False  # The unfinished line was already reported
+    with open(filename, "rb") as f:
+        while True:
+            count = f.readinto(stream_view[kept:])
+            end = kept + count
+            if not end:
+                return
+            data = bytes(stream_view[:end])
+            if line_number == 1 and not kept and b"\x00" in data:
+                return  # Binary file
+
+            start = 0
+            if pattern.could_match(data):
+                while True:
+                    newline = data.find(b"\n", start)
+                    if newline < 0:
+                        break
+                    if not reported and pattern.matches(data[start:newline]):
+                        yield line_number, data[start:newline]
+                    line_number += 1
+                    reported = False
+                    start = newline + 1
+            else:
+                newlines = data.count(b"\n")
+                if newlines:
+                    line_number += newlines
+                    reported = False
+                    start = data.rfind(b"\n") + 1
+
+            kept = end - start
+            if not count:
+                # End of file: the last line has no newline
+                if kept and not reported and pattern.matches(data[start:]):
+                    yield line_number, data[start:]
+                return
+            if kept > half:
+                if not reported and pattern.matches(data[start:]):
+                    yield line_number, data[start:]
+                    reported = True
+                kept = max(0, pattern.overlap)
+            stream_buffer[:kept] = data[end - kept:end]
+
+def format_search_hit(filename, line_number, line):
+    """
+    Format one /search result as "path:line:text".
+    
+    :param str filename: Path of the file
+    :param int line_number: Line number, starting at 1
+    :param bytes line: The matching line, shortened to SEARCH_LINE_BYTES
+    :rtype: str
+    """
+    line = line[:SEARCH_LINE_BYTES].rstrip(b"\r")
+    for cut in range(4):
+        try:
+            # A shortened line can end in the middle of a character
+            text = line[:len(line) - cut].decode()
+            break
+        except UnicodeError:
+            pass
+    else:
+        text = "(not UTF-8 text)"
+    return f"{filename}:{line_number}:{text}\n"
+
+@server.route("/search", [GET])
+def search_files(request: Request):
+    """
+    Find lines containing a string (or matching a regex) in all files below a directory.
+    
+    Files are walked in tree order and read in chunks through
+    stream_buffer, so memory use does not depend on the size of the tree or
+    of any file. Hits are streamed back per file while the search goes on,
+    and the walk stops as soon as max results were sent.
+    
+    :param Request request: The HTTP request object
+    :return: Chunked plain text, one "path:line:text" line per hit, then a
+        "#searched <files> files, <hits> matches" line, with
+        ", stopped at max=<max>" when there may be more
+    :rtype: Response
+    
+    Query Parameters:
+        - q: Text to find (required, up to 128 bytes)
+        - path: Directory to search (default: "/")
+        - filter: Only files matching this glob or extension (e.g. "*.py")
+        - regex: "1" to treat q as a regular expression
+        - ignore_case: "1" to ignore the case of ASCII letters
+        - max: Maximum number of hits (default: 100, at most 1000)
+    """
+    try:
+        query = get_query_value(request, "q")
+        path = normalize_path(get_query_value(request, "path", "/"))
+        name_filter = get_query_value(request, "filter")
+        limit = get_query_value(request, "max", str(SEARCH_DEFAULT_RESULTS))
+        if not query:
+            return Response(request, "Error: No search text specified", content_type="text/plain")
+        if len(query.encode()) > SEARCH_MAX_QUERY:
+            return Response(request, f"Error: Search text is limited to {SEARCH_MAX_QUERY} bytes", content_type="text/plain")
+        try:
+            limit = min(int(limit), SEARCH_MAX_RESULTS)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(request, "Error: max must be a positive number", content_type="text/plain")
+        if not is_directory(path):
+            return Response(request, f"Error: No such directory '{path}'", status=NOT_FOUND_404, content_type="text/plain")
+        try:
+            pattern = SearchPattern(query, get_query_flag(request, "regex"),
+                                    get_query_flag(request, "ignore_case"))
+        except Exception as e:
+            return Response(request, f"Error: Invalid search pattern - {str(e)}", content_type="text/plain")
+        flush_pending_writes()
+    except Exception as e:
+        print(f"Error in search_files: {e}")
+        return Response(request, f"Error: {str(e)}", content_type="text/plain")
+
+    def body():
+        entries = walk_directory(path, LIST_MAX_DEPTH)
+        if name_filter:
+            entries = filter_entries(entries, name_filter)
+        files = hits = 0
+        chunk = ""
+        for info in entries:
+            filename = info["name"]
+            if info["type"] != "file" or is_internal_file(filename):
+                continue
+            files += 1
+            matches = search_file(filename, pattern)
+            try:
+                for line_number, line in matches:
+                    chunk += format_search_hit(filename, line_number, line)
+                    hits += 1
+                    if hits >= limit:
+                        break
+                    if len(chunk) >= LIST_CHUNK_BYTES:
+                        yield chunk
+                        chunk = ""
+            except OSError as e:
+                print(f"Search: skipping '{filename}' - {e}")
+            finally:
+                matches.close()  # Closes the file when stopping early
+            if chunk:
+                yield chunk
+                chunk = ""
+            if hits >= limit:
+                yield f"#searched {files} files, {hits} matches, stopped at max={limit}\n"
+                return
+        yield f"#searched {files} files, {hits} matches\n"
+
+    return ChunkedResponse(request, body, content_type="text/plain; charset=utf-8")
+
 @server.route("/startup-log", methods=["POST"])
 def get_startup_log(request: Request):
     """
@@ -800,6 +4587,30 @@ def get_startup_log(request: Request):
     except Exception as e:
         return Response(request, f"Error retrieving startup log: {str(e)}", content_type="text/plain")
 
+# =============================================================================
+# STATIC FILE ROUTE
+# =============================================================================
+# Catch-all for GET/HEAD requests. Routes match in registration order, so this
+# must stay below every other route.
+
+@server.route("/....", [GET, HEAD])
+def serve_static_route(request: Request):
+    """
+    Serve any static asset below config.WEB_ROOT.
+    
+    Handles ``styles.css``, JavaScript modules, icons and fonts without a
+    dedicated route. The MIME type comes from STATIC_MIME_TYPES; unknown
+    extensions are not served.
+    
+    :param Request request: The HTTP request object
+    :return: Static file response (see serve_static_file)
+    :rtype: Response
+    """
+    filename = resolve_web_path(request.path)
+    if filename is None:
+        return Response(request, "Invalid path", status=FORBIDDEN_403, content_type="text/plain")
+    return serve_static_file(request, filename)
+
 # =============================================================================
 # SERVER STARTUP AND MAIN LOOP
 # =============================================================================
@@ -824,7 +4635,10 @@ while True:
         Any additional background tasks should be integrated here
         or handled via interrupts.
     """
-    server.poll()
+    if server.poll() == NO_REQUEST:
+        # Write queued saves only while no client is waiting on the server
+        flush_due_writes()
+        save_hash_index_changes()
     
     # Update blinky LED state
     update_blinky()
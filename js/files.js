@@ -0,0 +1,633 @@
+/**
+ * Picowide - File manager and editor
+ *
+ * Loaded on demand by the index.html shell the first time the file list or
+ * create-file panel is opened.
+ */
+
+// Panel markup, added to the shell's placeholder when this module loads
+document.getElementById('files-panel').innerHTML = `
+    <div id="create-file-section" style="display: none;">
+        <h3>Create New File:</h3>
+        <input type="text" id="new-filename" placeholder="filename.py" style="width: 70%; padding: 8px; margin: 4px;">
+        <button onclick="createFile()">Create</button>
+        <button onclick="hideCreateFile()">Cancel</button>
+    </div>
+
+    <button id="open-btn" style="display: none;" onclick="openSelectedFile()">Open</button>
+    <button id="delete-btn" style="display: none;" onclick="showDeleteConfirm()">Delete</button>
+    <button id="download-btn" style="display: none;" onclick="downloadSelectedFile()">Download</button>
+    <button id="rename-btn" style="display: none;" onclick="renameSelectedFile()">Rename</button>
+    <button id="copy-btn" style="display: none;" onclick="copySelectedFile()">Copy</button>
+
+    <div id="file-list" class="file-list" style="display: none;">
+        <h3>Files: <span id="file-list-path">/</span> <span id="file-list-free"></span></h3>
+        <input type="text" id="file-filter" placeholder="Filter, e.g. *.py" onchange="loadFileManager()">
+        <input type="text" id="file-search" placeholder="Search in files" onchange="searchFiles()">
+        <select id="file-sort" onchange="loadFileManager()">
+            <option value="name">Name</option>
+            <option value="-size">Largest first</option>
+            <option value="-mtime">Newest first</option>
+        </select>
+        <div id="files" class="files"></div>
+        <button id="files-more-btn" style="display: none;" onclick="loadMoreFiles()">Load More</button>
+        <input type="file" id="upload-input" multiple style="display: none;" onchange="uploadFiles()">
+        <button onclick="document.getElementById('upload-input').click()">Upload Files</button>
+        <input type="file" id="import-input" accept=".tar,.zip" style="display: none;" onchange="importArchive()">
+        <button onclick="document.getElementById('import-input').click()">Import Archive</button>
+        <button onclick="exportFolder()">Export Folder (.tar)</button>
+        <button onclick="closeFileList()">Close File List</button>
+    </div>
+
+    <div id="editor-section" style="display: none;">
+        <h3 id="editor-title">Editing: filename</h3>
+        <textarea id="file-editor" rows="20" cols="80"
+                  style="width: 100%; font-family: monospace; font-size: 14px;"
+                  placeholder="File content will appear here..."></textarea>
+        <div id="editor-pager" style="display: none;">
+            <button onclick="showEditorPage(-1)">Previous</button>
+            <span id="editor-page-info"></span>
+            <button onclick="showEditorPage(1)">Next</button>
+        </div>
+        <br>
+        <button onclick="saveFile()">Save</button>
+        <button onclick="closeEditor()">Close</button>
+    </div>
+`;
+
+// Entries fetched per request; "Load More" fetches the next page, so even a
+// full library bundle never puts thousands of rows in the page
+const FILE_PAGE_SIZE = 50;
+
+// Directory being browsed and the cursor of its next page
+const fileBrowser = { path: '/', next: null };
+
+function loadFileManager(path) {
+    if (typeof path === 'string') fileBrowser.path = path;
+    fileBrowser.next = null;
+    document.getElementById('files').innerHTML = '';
+    document.getElementById('file-list-path').textContent = fileBrowser.path;
+    showFreeSpace().catch(() => {});
+    if (fileBrowser.path !== '/') {
+        const parent = fileBrowser.path.slice(0, fileBrowser.path.lastIndexOf('/')) || '/';
+        addFileRow('../', () => loadFileManager(parent));
+    }
+    loadFilePage();
+}
+
+function loadMoreFiles() {
+    if (fileBrowser.next !== null) loadFilePage();
+}
+
+function loadFilePage() {
+    const formData = new FormData();
+    formData.append('path', fileBrowser.path);
+    formData.append('format', 'json');
+    formData.append('limit', FILE_PAGE_SIZE);
+    formData.append('sort', document.getElementById('file-sort').value);
+    const filter = document.getElementById('file-filter').value.trim();
+    if (filter) formData.append('filter', filter);
+    if (fileBrowser.next !== null) formData.append('cursor', fileBrowser.next);
+    
+    fetch('/list-files', { method: 'POST', body: formData })
+        .then(response => response.text())
+        .then(result => {
+            let listing;
+            try {
+                listing = JSON.parse(result);
+            } catch (error) {
+                // Errors come back as plain text
+                document.getElementById('result').textContent = result;
+                document.getElementById('file-list').style.display = 'none';
+                return;
+            }
+            const prefix = fileBrowser.path === '/' ? '/' : fileBrowser.path + '/';
+            listing.entries.forEach(entry => {
+                const name = entry.name.slice(prefix.length);
+                if (entry.type === 'directory') {
+                    addFileRow(name + '/', () => loadFileManager(entry.name));
+                } else {
+                    addFileRow(`${name} (${entry.size} bytes)`, () => selectFile(entry.name));
+                }
+            });
+            fileBrowser.next = listing.next;
+            document.getElementById('files-more-btn').style.display = listing.next !== null ? 'inline-block' : 'none';
+            document.getElementById('result').textContent = '';
+            document.getElementById('file-list').style.display = 'block';
+        })
+        .catch(error => {
+            document.getElementById('result').textContent = 'Error: ' + error.message;
+            document.getElementById('file-list').style.display = 'none';
+        });
+}
+
+// Search the files below the folder being browsed; each hit becomes a row
+// that selects its file
+function searchFiles() {
+    const query = document.getElementById('file-search').value;
+    if (!query) return loadFileManager();
+    const params = new URLSearchParams({ q: query, path: fileBrowser.path, ignore_case: '1' });
+    const filter = document.getElementById('file-filter').value.trim();
+    if (filter) params.append('filter', filter);
+    document.getElementById('files').innerHTML = '';
+    document.getElementById('files-more-btn').style.display = 'none';
+    addFileRow('Back to file list', () => loadFileManager());
+    fetch('/search?' + params)
+        .then(response => response.text())
+        .then(result => {
+            if (result.startsWith('Error')) {
+                document.getElementById('result').textContent = result;
+                return;
+            }
+            result.split('\n').forEach(line => {
+                if (line.startsWith('#')) {
+                    document.getElementById('result').textContent = line.slice(1);
+                } else if (line) {
+                    const filename = line.slice(0, line.indexOf(':'));
+                    addFileRow(line, () => selectFile(filename));
+                }
+            });
+        })
+        .catch(error => {
+            document.getElementById('result').textContent = 'Error: ' + error.message;
+        });
+}
+
+// Drive capacity from /fs-info: shown next to the folder name, and checked
+// before uploads so a file that cannot fit is not sent over the hotspot
+function showFreeSpace() {
+    return fetch('/fs-info')
+        .then(response => response.json())
+        .then(info => {
+            document.getElementById('file-list-free').textContent = `(${Math.floor(info.free / 1024)} KB free)`;
+            return info;
+        });
+}
+
+function ensureSpaceFor(bytes) {
+    return showFreeSpace().then(info => {
+        if (bytes > info.largest_file) {
+            throw new Error(`Not enough space on the drive (${bytes} bytes needed, ${info.largest_file} available)`);
+        }
+    }, () => {});  // Capacity unknown: leave the check to the Pico
+}
+
+function addFileRow(label, onclick) {
+    const fileRow = document.createElement('div');
+    fileRow.className = 'file-row';
+    fileRow.textContent = label;
+    fileRow.onclick = onclick;
+    document.getElementById('files').appendChild(fileRow);
+}
+
+function selectFile(filename) {
+    const formData = new FormData();
+    formData.append('filename', filename);
+    
+    fetch('/select-file', { 
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.text())
+    .then(result => {
+        document.getElementById('result').textContent = result;
+        // These lines were commented out in the previous version, causing the issue.
+        // They are now re-enabled to show the Open/Delete buttons.
+        document.getElementById('open-btn').style.display = 'inline-block';
+        document.getElementById('delete-btn').style.display = 'inline-block';
+        document.getElementById('download-btn').style.display = 'inline-block';
+        document.getElementById('rename-btn').style.display = 'inline-block';
+        document.getElementById('copy-btn').style.display = 'inline-block';
+        document.getElementById('open-btn').setAttribute('data-filename', filename);
+        document.getElementById('delete-btn').setAttribute('data-filename', filename);
+        document.getElementById('download-btn').setAttribute('data-filename', filename);
+        document.getElementById('rename-btn').setAttribute('data-filename', filename);
+        document.getElementById('copy-btn').setAttribute('data-filename', filename);
+    })
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+// Files up to this size open in one piece; larger files are edited a page
+// of lines at a time
+const EDITOR_MAX_BYTES = 65536;
+const EDITOR_PAGE_LINES = 500;
+
+// Paged view state: null while editing a whole file
+let editorPage = null;
+
+// What the editor was loaded from, so Save can send only the change:
+// { hash, offset, text, patchable }
+let editorBase = null;
+
+function readFileRange(filename, fields) {
+    const formData = new FormData();
+    formData.append('filename', filename);
+    Object.keys(fields).forEach(name => formData.append(name, fields[name]));
+    
+    return fetch('/open-file', { 
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.text().then(content => ({
+        // The body is the raw file; only a successful open carries X-Filename
+        opened: response.headers.has('X-Filename'),
+        size: parseInt(response.headers.get('X-File-Size') || '0', 10),
+        totalLines: parseInt(response.headers.get('X-Total-Lines') || '0', 10),
+        base: {
+            hash: response.headers.get('X-Content-Hash'),
+            offset: parseInt(response.headers.get('X-Offset') || '0', 10),
+            text: content,
+            // Byte offsets are computed from the text, so patches need an
+            // exact UTF-8 round trip and no CRs for the textarea to normalise
+            patchable: !content.includes('\r') &&
+                new TextEncoder().encode(content).length ===
+                    parseInt(response.headers.get('Content-Length') || '-1', 10)
+        },
+        content: content
+    })));
+}
+
+function showEditor(filename, content) {
+    document.getElementById('file-editor').value = content;
+    document.getElementById('editor-title').textContent = `Editing: ${filename}`;
+    document.getElementById('editor-section').style.display = 'block';
+    document.getElementById('open-btn').style.display = 'none';
+    document.getElementById('delete-btn').style.display = 'none';
+    document.getElementById('download-btn').style.display = 'none';
+    document.getElementById('rename-btn').style.display = 'none';
+    document.getElementById('copy-btn').style.display = 'none';
+    document.getElementById('file-list').style.display = 'none'; // Hide file list when editor opens
+}
+
+function openSelectedFile() {
+    const filename = document.getElementById('open-btn').getAttribute('data-filename');
+    if (!filename) return;
+    
+    readFileRange(filename, { offset: 0, length: EDITOR_MAX_BYTES })
+    .then(({ opened, size, base, content }) => {
+        if (!opened) {
+            document.getElementById('result').textContent = content;
+            return;
+        }
+        if (size <= EDITOR_MAX_BYTES) {
+            editorPage = null;
+            editorBase = base;
+            document.getElementById('file-editor').readOnly = false;
+            document.getElementById('editor-pager').style.display = 'none';
+            showEditor(filename, content);
+            document.getElementById('result').textContent = `Opened ${filename} in editor`;
+            return;
+        }
+        editorPage = { filename: filename, startLine: 0, totalLines: 0 };
+        showEditorPage(0);
+    })
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+function showEditorPage(direction) {
+    if (!editorPage) return;
+    if (direction !== 0 && editorBase && document.getElementById('file-editor').value !== editorBase.text) {
+        document.getElementById('result').textContent = 'Save or close before changing page';
+        return;
+    }
+    const startLine = Math.max(0, editorPage.startLine + direction * EDITOR_PAGE_LINES);
+    if (direction > 0 && startLine >= editorPage.totalLines) return;
+    
+    readFileRange(editorPage.filename, { start_line: startLine, line_count: EDITOR_PAGE_LINES })
+    .then(({ opened, size, totalLines, base, content }) => {
+        if (!opened) {
+            document.getElementById('result').textContent = content;
+            return;
+        }
+        editorPage.startLine = startLine;
+        editorPage.totalLines = totalLines;
+        editorBase = base;
+        const lastLine = Math.min(startLine + EDITOR_PAGE_LINES, totalLines);
+        document.getElementById('file-editor').readOnly = !base.patchable;
+        document.getElementById('editor-pager').style.display = 'block';
+        document.getElementById('editor-page-info').textContent =
+            `Lines ${startLine + 1}–${lastLine} of ${totalLines}`;
+        showEditor(editorPage.filename, content);
+        document.getElementById('result').textContent = base.patchable
+            ? `Opened ${editorPage.filename} (${size} bytes) a page at a time`
+            : `Opened ${editorPage.filename} read-only (${size} bytes is too large to edit in one piece)`;
+    })
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+// Smallest single edit turning oldText into newText, as a byte range of
+// oldText plus replacement text
+function computeEdit(oldText, newText) {
+    const shortest = Math.min(oldText.length, newText.length);
+    let prefix = 0;
+    while (prefix < shortest && oldText.charCodeAt(prefix) === newText.charCodeAt(prefix)) prefix++;
+    // Never split a surrogate pair
+    if (prefix > 0 && (oldText.charCodeAt(prefix - 1) & 0xFC00) === 0xD800) prefix--;
+    let suffix = 0;
+    while (suffix < shortest - prefix &&
+           oldText.charCodeAt(oldText.length - 1 - suffix) === newText.charCodeAt(newText.length - 1 - suffix)) suffix++;
+    if (suffix > 0 && (oldText.charCodeAt(oldText.length - suffix) & 0xFC00) === 0xDC00) suffix--;
+    
+    const encoder = new TextEncoder();
+    return {
+        offset: encoder.encode(oldText.slice(0, prefix)).length,
+        length: encoder.encode(oldText.slice(prefix, oldText.length - suffix)).length,
+        text: newText.slice(prefix, newText.length - suffix)
+    };
+}
+
+function handleSaveResponse(response) {
+    return response.text().then(result => {
+        const hash = response.headers.get('X-Content-Hash');
+        // After a 409 the old base is kept, so saving keeps failing until
+        // the file is reopened
+        if (response.ok) {
+            if (hash && editorBase) {
+                editorBase.hash = hash;
+                editorBase.text = document.getElementById('file-editor').value;
+            } else {
+                editorBase = null;  // Unknown version: next save sends the whole file
+            }
+        }
+        document.getElementById('result').textContent = result;
+        // Line numbers after the edit may have moved; reload the page
+        if (response.ok && hash && editorPage) showEditorPage(0);
+    });
+}
+
+function saveFile() {
+    const filename = document.getElementById('editor-title').textContent.replace('Editing: ', '');
+    const content = document.getElementById('file-editor').value;
+    
+    if (editorBase && editorBase.hash && editorBase.patchable) {
+        if (content === editorBase.text) {
+            document.getElementById('result').textContent = 'No changes to save';
+            return;
+        }
+        // Send only the changed bytes, checked against the version we loaded
+        const edit = computeEdit(editorBase.text, content);
+        edit.offset += editorBase.offset;
+        fetch('/patch-file', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: filename, base: editorBase.hash, edits: [edit] })
+        })
+        .then(handleSaveResponse)
+        .catch(error => {
+            document.getElementById('result').textContent = 'Error: ' + error.message;
+        });
+        return;
+    }
+    if (editorPage) {
+        document.getElementById('result').textContent = 'Error: This file can only be saved a page at a time, and this page could not be loaded for editing';
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('filename', filename);
+    formData.append('content', content);
+    
+    // FormData automatically uses multipart/form-data encoding
+    // which preserves special characters including quotes
+    fetch('/save-file', { 
+        method: 'POST',
+        body: formData
+    })
+    .then(handleSaveResponse)
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+function closeEditor() {
+    editorPage = null;
+    editorBase = null;
+    document.getElementById('file-editor').readOnly = false;
+    document.getElementById('editor-pager').style.display = 'none';
+    document.getElementById('editor-section').style.display = 'none';
+    document.getElementById('result').textContent = 'Editor closed';
+    loadFileManager(); // Re-show file list after closing editor
+}
+
+// New function to show custom delete confirmation
+function showDeleteConfirm() {
+    const filename = document.getElementById('delete-btn').getAttribute('data-filename');
+    if (!filename) return;
+    loadModule('modal').then(() => {
+        showCustomConfirm(`Are you sure you want to delete '${filename}'?`, (confirmed, fileToDelete) => {
+            if (confirmed) {
+                deleteSelectedFileConfirmed(fileToDelete);
+            } else {
+                document.getElementById('result').textContent = 'Deletion cancelled.';
+            }
+        }, filename);
+    });
+}
+
+// Modified delete function to be called after confirmation
+function deleteSelectedFileConfirmed(filename) {
+    const formData = new FormData();
+    formData.append('filename', filename);
+    
+    fetch('/delete-file', { 
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.text())
+    .then(result => {
+        document.getElementById('result').textContent = result;
+        if (result.includes('deleted successfully')) {
+            document.getElementById('open-btn').style.display = 'none';
+            document.getElementById('delete-btn').style.display = 'none';
+            document.getElementById('download-btn').style.display = 'none';
+            document.getElementById('rename-btn').style.display = 'none';
+            document.getElementById('copy-btn').style.display = 'none';
+            loadFileManager(); // Refresh file list
+        }
+    })
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+// Binary-safe transfers: /download and /upload move raw bytes, so images,
+// sounds, fonts and .mpy files survive unchanged
+function downloadSelectedFile() {
+    const filename = document.getElementById('download-btn').getAttribute('data-filename');
+    if (!filename) return;
+    const link = document.createElement('a');
+    link.href = '/download?path=' + encodeURIComponent(filename);
+    link.download = filename.split('/').pop();
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+}
+
+// Rename or move on the Pico itself; nothing is transferred
+function renameSelectedFile() {
+    const filename = document.getElementById('rename-btn').getAttribute('data-filename');
+    if (!filename) return;
+    const destination = prompt('Rename or move to:', filename);
+    if (!destination || destination === filename) return;
+    postSourceAndDestination('/rename', filename, destination, 'Renamed', true);
+}
+
+// The Pico copies file to file (folders included), so nothing goes over Wi-Fi
+function copySelectedFile() {
+    const filename = document.getElementById('copy-btn').getAttribute('data-filename');
+    if (!filename) return;
+    const dot = filename.lastIndexOf('.');
+    const suggestion = dot > filename.lastIndexOf('/') + 1
+        ? filename.slice(0, dot) + ' copy' + filename.slice(dot)
+        : filename + ' copy';
+    const destination = prompt('Copy to:', suggestion);
+    if (!destination || destination === filename) return;
+    postSourceAndDestination('/copy', filename, destination, 'Copied', false);
+}
+
+function postSourceAndDestination(url, source, destination, success, deselect) {
+    const formData = new FormData();
+    formData.append('from', source);
+    formData.append('to', destination);
+    fetch(url, { method: 'POST', body: formData })
+    .then(response => response.text())
+    .then(result => {
+        document.getElementById('result').textContent = result;
+        if (result.startsWith(success)) {
+            if (deselect) {
+                ['open-btn', 'delete-btn', 'download-btn', 'rename-btn', 'copy-btn'].forEach(id => {
+                    document.getElementById(id).style.display = 'none';
+                });
+            }
+            loadFileManager(); // Refresh file list
+        }
+    })
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+// Back up the folder being browsed (the whole drive from "/") as a tar file;
+// the browser saves it while the Pico streams it
+function exportFolder() {
+    const link = document.createElement('a');
+    link.href = '/export?path=' + encodeURIComponent(fileBrowser.path);
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+}
+
+// Unpack a .tar or uncompressed .zip into the folder being browsed, in one
+// request; the Pico reports each entry as it is written
+function importArchive() {
+    const input = document.getElementById('import-input');
+    const file = input.files[0];
+    input.value = '';
+    if (!file) return;
+    const replace = confirm(`Also delete files in ${fileBrowser.path} that are not in ${file.name}?`);
+    const result = document.getElementById('result');
+    result.textContent = `Importing ${file.name}...`;
+    ensureSpaceFor(file.size)
+    .then(() => fetch('/import?path=' + encodeURIComponent(fileBrowser.path) + (replace ? '&replace=1' : ''), {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/octet-stream' },
+        body: file
+    }))
+    .then(response => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let report = '';
+        const read = () => reader.read().then(({ done, value }) => {
+            if (done) return;
+            report += decoder.decode(value, { stream: true });
+            result.textContent = report;
+            return read();
+        });
+        return read();
+    })
+    .then(() => loadFileManager())
+    .catch(error => {
+        result.textContent = 'Error: ' + error.message;
+    });
+}
+
+function uploadFiles() {
+    const input = document.getElementById('upload-input');
+    const files = Array.from(input.files);
+    input.value = '';
+    // One at a time: the Pico handles a single request at once
+    files.reduce((previous, file) => previous.then(() => {
+        document.getElementById('result').textContent = `Uploading ${file.name} (${file.size} bytes)...`;
+        const path = (fileBrowser.path === '/' ? '' : fileBrowser.path) + '/' + file.name;
+        return fetch('/upload?path=' + encodeURIComponent(path), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/octet-stream' },
+            body: file
+        })
+        .then(response => response.text())
+        .then(result => {
+            document.getElementById('result').textContent = result;
+        });
+    }), ensureSpaceFor(files.reduce((total, file) => total + file.size, 0)))
+    .then(() => loadFileManager())
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+// ADD CREATE FILE FUNCTIONS USING EXACT SAME PATTERN AS WORKING BUTTONS
+function showCreateFile() {
+    document.getElementById('create-file-section').style.display = 'block';
+    document.getElementById('new-filename').focus();
+    document.getElementById('result').textContent = '';
+}
+
+function hideCreateFile() {
+    document.getElementById('create-file-section').style.display = 'none';
+    document.getElementById('new-filename').value = '';
+}
+
+function createFile() {
+    const filename = document.getElementById('new-filename').value.trim();
+    
+    if (!filename) {
+        document.getElementById('result').textContent = 'Please enter a filename';
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('filename', filename);
+    
+    fetch('/create-file', { 
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.text())
+    .then(result => {
+        document.getElementById('result').textContent = result;
+        if (result.includes('created successfully')) {
+            hideCreateFile();
+            loadFileManager();
+        }
+    })
+    .catch(error => {
+        document.getElementById('result').textContent = 'Error: ' + error.message;
+    });
+}
+
+// NEW FUNCTION TO CLOSE THE FILE LIST
+function closeFileList() {
+    document.getElementById('file-list').style.display = 'none';
+    document.getElementById('result').textContent = 'File list closed.';
+    document.getElementById('open-btn').style.display = 'none'; // Hide open/delete buttons
+    document.getElementById('delete-btn').style.display = 'none';
+    document.getElementById('download-btn').style.display = 'none';
+    document.getElementById('rename-btn').style.display = 'none';
+    document.getElementById('copy-btn').style.display = 'none';
+}
@@ -0,0 +1,44 @@
+/**
+ * Picowide - Hotspot control
+ *
+ * Loaded on demand by the index.html shell the first time the hotspot
+ * button is pressed.
+ */
+
+function toggleHotspotControl() {
+    const currentText = document.getElementById('hotspot-btn').textContent;
+    
+    if (currentText === 'Close Hotspot') {
+        // Show confirmation before closing
+        loadModule('modal').then(() => {
+            showCustomConfirm("Are you sure you want to close the Wi-Fi hotspot? A physical power cycle will be required to restart it.", (confirmed) => {
+                if (confirmed) {
+                    fetch('/toggle-hotspot-control', { method: 'POST' })
+                        .then(response => response.text())
+                        .then(result => {
+                            document.getElementById('result').textContent = result;
+                            // Optionally disable all buttons here as the hotspot is going down
+                            const buttons = document.querySelectorAll('button');
+                            buttons.forEach(button => button.disabled = true);
+                        })
+                        .catch(error => {
+                            document.getElementById('result').textContent = 'Error: ' + error.message;
+                        });
+                } else {
+                    document.getElementById('result').textContent = 'Hotspot closure cancelled.';
+                }
+            });
+        });
+    } else {
+        // Keep hotspot open (disable timeout)
+        fetch('/toggle-hotspot-control', { method: 'POST' })
+            .then(response => response.text())
+            .then(result => {
+                document.getElementById('hotspot-btn').textContent = result;
+                document.getElementById('result').textContent = 'Automatic timeout disabled. Hotspot will remain open.';
+            })
+            .catch(error => {
+                document.getElementById('result').textContent = 'Error: ' + error.message;
+            });
+    }
+}
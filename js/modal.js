@@ -0,0 +1,37 @@
+/**
+ * Picowide - Confirmation modal
+ *
+ * Loaded on demand by the index.html shell (see loadModule) the first time
+ * a confirmation is needed.
+ */
+
+// Dialog markup, added to the page when this module loads
+document.body.insertAdjacentHTML('beforeend', `
+    <div id="confirmModal" class="modal" style="display: none;">
+        <div class="modal-content">
+            <h3 id="confirm-message"></h3>
+            <button id="confirmYes" onclick="confirmAction(true)">Yes</button>
+            <button id="confirmNo" onclick="confirmAction(false)">No</button>
+        </div>
+    </div>
+`);
+
+// Global variables for modal handling
+let currentConfirmAction = null;
+let currentConfirmFilename = '';
+
+function showCustomConfirm(message, callback, filename) {
+    document.getElementById('confirmModal').style.display = 'block';
+    document.getElementById('confirm-message').textContent = message;
+    currentConfirmAction = callback;
+    currentConfirmFilename = filename;
+}
+
+function confirmAction(isConfirmed) {
+    document.getElementById('confirmModal').style.display = 'none';
+    if (currentConfirmAction) {
+        currentConfirmAction(isConfirmed, currentConfirmFilename);
+    }
+    currentConfirmAction = null;
+    currentConfirmFilename = '';
+}
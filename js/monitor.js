@@ -0,0 +1,63 @@
+/**
+ * Picowide - Console monitor
+ *
+ * Loaded on demand by the index.html shell the first time the monitor
+ * button is pressed.
+ */
+
+// Panel markup, added to the shell's placeholder when this module loads
+document.getElementById('monitor-panel').innerHTML = `
+    <div id="monitor-section" style="display: none;">
+        <h3>Console Monitor</h3>
+        <div id="console-output" style="width: 100%; height: 300px; background-color: #fff; color: #000; font-family: monospace; font-size: 12px; padding: 10px; overflow-y: auto; border: 2px solid #333; text-align: left;"></div>
+        <button onclick="clearMonitor()">Clear Monitor</button>
+    </div>
+`;
+
+let monitorInterval;
+
+function runMonitor() {
+    fetch('/run-monitor', { method: 'POST' })
+        .then(response => response.text())
+        .then(result => {
+            document.getElementById('monitor-btn').textContent = result;
+            if (result === 'Monitor Off') {
+                document.getElementById('monitor-section').style.display = 'block';
+                startMonitoring();
+            } else {
+                document.getElementById('monitor-section').style.display = 'none';
+                stopMonitoring();
+            }
+        })
+        .catch(error => {
+            document.getElementById('result').textContent = 'Error: ' + error.message;
+        });
+}
+
+function startMonitoring() {
+    monitorInterval = setInterval(() => {
+        fetch('/get-console', { method: 'POST' })
+            .then(response => response.text())
+            .then(result => {
+                if (result.trim()) {
+                    const consoleDiv = document.getElementById('console-output');
+                    consoleDiv.innerHTML += result + '<br>';
+                    consoleDiv.scrollTop = consoleDiv.scrollHeight;
+                }
+            })
+            .catch(error => {
+                console.log('Monitor fetch error:', error);
+            });
+    }, 500);
+}
+
+function stopMonitoring() {
+    if (monitorInterval) {
+        clearInterval(monitorInterval);
+        monitorInterval = null;
+    }
+}
+
+function clearMonitor() {
+    document.getElementById('console-output').innerHTML = '';
+}
@@ -0,0 +1,29 @@
+/**
+ * Picowide - Startup log viewer
+ *
+ * Loaded on demand by the index.html shell the first time the startup log
+ * button is pressed.
+ */
+
+function toggleStartupLog() {
+    const logDiv = document.getElementById('startup-log-output');
+    const btn = document.getElementById('startup-log-btn');
+    
+    if (logDiv.style.display === 'none') {
+        fetch('/startup-log', { method: 'POST' })
+            .then(response => response.text())
+            .then(result => {
+                logDiv.innerHTML = '<pre>' + result + '</pre>';
+                logDiv.style.display = 'block';
+                btn.textContent = 'Hide Startup Log';
+            })
+            .catch(error => {
+                logDiv.textContent = 'Error: ' + error.message;
+                logDiv.style.display = 'block';
+                btn.textContent = 'Hide Startup Log';
+            });
+    } else {
+        logDiv.style.display = 'none';
+        btn.textContent = 'View Startup Log';
+    }
+}
@@ -0,0 +1,46 @@
+/**
+ * Picowide - Offline app shell service worker
+ *
+ * Served by the /sw.js route in code.py, which prepends SHELL_VERSION and
+ * SHELL_ASSETS (derived from asset-manifest.json or the shell files'
+ * ETags). A new version therefore changes this script's bytes, the browser
+ * installs the new worker and the old cache is dropped.
+ *
+ * Shell assets are answered from the cache, so reopening the IDE does not
+ * touch the Pico. Everything else - the POST API routes and GET endpoints
+ * such as downloads - always goes to the device.
+ */
+
+const CACHE_PREFIX = 'picowide-';
+const CACHE_NAME = CACHE_PREFIX + SHELL_VERSION;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(SHELL_ASSETS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith(CACHE_PREFIX) && key !== CACHE_NAME)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin ||
+            !SHELL_ASSETS.includes(url.pathname)) {
+        return; // Let the browser go to the device as usual
+    }
+    event.respondWith(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.match(url.pathname))
+            .then(cached => cached || fetch(event.request))
+    );
+});
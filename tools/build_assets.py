@@ -0,0 +1,525 @@
+"""
+Picowide - Host-side static asset build step
+
+Produces precompressed copies of the web interface files so the Pico can
+send ``index.html.gz`` / ``styles.css.gz`` to browsers that accept gzip
+instead of pushing the full-size files over the access point link.
+Optionally bundles the interface: minifies it, fingerprints (or inlines)
+the stylesheet and writes an ``asset-manifest.json`` that code.py uses to
+mark fingerprinted files as immutable.
+
+Runs on the development computer (regular CPython), NOT on the Pico.
+
+Usage:
+    python tools/build_assets.py            # (re)build the .gz files
+    python tools/build_assets.py --check    # verify the .gz files are current
+    python tools/build_assets.py --root /media/CIRCUITPY
+    python tools/build_assets.py --bundle dist [--inline-css]
+    python tools/build_assets.py --self-test  # check the minifiers on tricky samples
+
+Copy the generated ``.gz`` files to the CIRCUITPY root next to the plain
+files, after the plain files (a ``.gz`` older than its plain file is
+ignored). The plain files must stay on the drive as the fallback for
+clients without gzip support. With ``--bundle``, copy the contents of the
+output directory instead of the source ``index.html`` / ``styles.css``.
+
+Author: Picowide Project
+License: MIT
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Static assets served by code.py that benefit from compression
+DEFAULT_ASSETS = ["index.html", "styles.css"]
+
+
+def compress_bytes(data):
+    """
+    Gzip data reproducibly.
+
+    The header timestamp is fixed at 0 so identical input always yields an
+    identical ``.gz`` file, which keeps ``--check`` and version control quiet.
+
+    :param bytes data: Uncompressed file contents
+    :return: Gzip-compressed data
+    :rtype: bytes
+    """
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build_asset(path):
+    """
+    Write ``<path>.gz`` for a single asset.
+
+    :param str path: Path of the plain asset
+    :return: Tuple of (plain_size, compressed_size)
+    :rtype: tuple[int, int]
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = compress_bytes(data)
+    with open(path + ".gz", "wb") as f:
+        f.write(compressed)
+    return len(data), len(compressed)
+
+
+def check_asset(path):
+    """
+    Verify that ``<path>.gz`` exists and decompresses to the current file.
+
+    :param str path: Path of the plain asset
+    :return: Error message, or empty string if the compressed copy is current
+    :rtype: str
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return f"cannot read {path}: {e}"
+    try:
+        with open(path + ".gz", "rb") as f:
+            compressed = f.read()
+    except OSError:
+        return f"{path}.gz is missing - run tools/build_assets.py"
+    try:
+        if gzip.decompress(compressed) != data:
+            return f"{path}.gz is stale - run tools/build_assets.py"
+    except (OSError, EOFError) as e:
+        return f"{path}.gz is corrupt: {e}"
+    return ""
+
+
+# =============================================================================
+# BUNDLING - minify and fingerprint into an output directory
+# =============================================================================
+
+MANIFEST_NAME = "asset-manifest.json"
+
+# Elements whose text content must not be whitespace-collapsed
+_RAW_TEXT_TAGS = ("pre", "textarea", "script", "style")
+
+
+def _tighten_css(code):
+    """
+    Drop the spaces around CSS punctuation in a run of code (no strings).
+
+    :param str code: Code with whitespace already collapsed to single spaces
+    :return: Tightened code
+    :rtype: str
+    """
+    # No space before ':' is removed - "a :hover" and "a:hover" differ
+    code = re.sub(r" ?([{};,>]) ?", r"\1", code).replace(": ", ":")
+    return code.replace(";}", "}")
+
+
+def minify_css(css):
+    """
+    Minify CSS conservatively.
+
+    Removes comments and collapses whitespace. Quoted strings are copied
+    verbatim; only the code between them is tightened.
+
+    :param str css: Stylesheet source
+    :return: Minified stylesheet
+    :rtype: str
+    """
+    out = []
+    code = []  # Code since the last string, whitespace collapsed
+
+    def flush_code():
+        out.append(_tighten_css("".join(code)))
+        code.clear()
+
+    i, n = 0, len(css)
+    while i < n:
+        c = css[i]
+        if c in "\"'":
+            end = i + 1
+            while end < n and css[end] != c:
+                end += 2 if css[end] == "\\" else 1
+            flush_code()
+            out.append(css[i:end + 1])
+            i = end + 1
+        elif css.startswith("/*", i) or c.isspace():
+            if c.isspace():
+                i += 1
+            else:
+                end = css.find("*/", i + 2)
+                i = n if end == -1 else end + 2
+            if code and code[-1] != " ":
+                code.append(" ")
+            elif not code and out and not out[-1].endswith(" "):
+                code.append(" ")  # Space after a string, e.g. '"a" b'
+        else:
+            code.append(c)
+            i += 1
+    flush_code()
+    return "".join(out).strip()
+
+
+# A "/" after one of these characters or keywords starts a regex literal;
+# anywhere else (after a name, number, ")" or "]") it divides
+_REGEX_PRECEDERS = "(,=:[!&|?{};+-*%<>~^"
+_REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "of", "new",
+                   "delete", "void", "throw", "instanceof", "yield", "await")
+
+
+def _regex_allowed(code):
+    """
+    Check whether a "/" following this code starts a regex literal.
+
+    :param str code: Minified code so far (literals replaced by placeholders)
+    :rtype: bool
+    """
+    code = code.rstrip()
+    if not code or code[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r"(^|[^\w$.])([A-Za-z_$][\w$]*)$", code)
+    return bool(word) and word.group(2) in _REGEX_KEYWORDS
+
+
+def _literal_end(js, i):
+    """
+    Find the end of the string, template or regex literal starting at js[i].
+
+    :param str js: Script source
+    :param int i: Index of the opening quote, backtick or "/"
+    :return: Index just past the literal (and a regex's flags)
+    :rtype: int
+    """
+    n = len(js)
+    quote = js[i]
+    end = i + 1
+    in_class = False
+    while end < n:
+        c = js[end]
+        if c == "\\":
+            end += 2
+            continue
+        if quote == "/":
+            if c == "\n":
+                break  # Not a regex after all; leave the rest alone
+            if c == "[":
+                in_class = True
+            elif c == "]":
+                in_class = False
+            elif c == "/" and not in_class:
+                break
+        elif c == quote:
+            break
+        end += 1
+    end += 1
+    if quote == "/":
+        while end < n and (js[end].isalnum() or js[end] in "_$"):
+            end += 1
+    return min(end, n)
+
+
+def minify_js(js):
+    """
+    Minify JavaScript conservatively.
+
+    Strips comments, indentation and blank lines but keeps line breaks, so
+    automatic semicolon insertion behaves exactly as in the source. String,
+    template and regex literals are copied untouched, including line
+    breaks and indentation inside template literals.
+
+    :param str js: Script source
+    :return: Minified script
+    :rtype: str
+    """
+    out = []
+    literals = []
+    i, n = 0, len(js)
+    while i < n:
+        c = js[i]
+        if js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end == -1 else end
+        elif c in "\"'`" or (c == "/" and _regex_allowed("".join(out))):
+            end = _literal_end(js, i)
+            # Placeholders keep literals out of the line stripping below
+            out.append(f"\0{len(literals)}\0")
+            literals.append(js[i:end])
+            i = end
+        else:
+            out.append(c)
+            i += 1
+    lines = (line.strip() for line in "".join(out).splitlines())
+    code = "\n".join(line for line in lines if line)
+    return re.sub("\0(\\d+)\0", lambda m: literals[int(m.group(1))], code)
+
+
+def minify_html(html):
+    """
+    Minify an HTML document conservatively.
+
+    Comments are removed and whitespace runs collapse to a single space
+    (never removed, so inline spacing between buttons is preserved).
+    Inline ``<style>`` and ``<script>`` blocks are minified with minify_css()
+    and minify_js(); ``<pre>`` and ``<textarea>`` content is left alone.
+
+    :param str html: Document source
+    :return: Minified document
+    :rtype: str
+    """
+    html = re.sub(r"<!--(?!\[if).*?-->", "", html, flags=re.S)
+    pattern = re.compile(r"(<(%s)\b[^>]*>)(.*?)(</\2\s*>)" % "|".join(_RAW_TEXT_TAGS), re.S | re.I)
+    out = []
+    pos = 0
+    for match in pattern.finditer(html):
+        out.append(re.sub(r"\s+", " ", html[pos:match.start()]))
+        open_tag, tag, body, close_tag = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script":
+            body = minify_js(body)
+        out.append(re.sub(r"\s+", " ", open_tag) + body + close_tag)
+        pos = match.end()
+    out.append(re.sub(r"\s+", " ", html[pos:]))
+    return "".join(out).strip()
+
+
+def fingerprint_name(name, data):
+    """
+    Insert a short content hash into a filename: ``styles.css`` -> ``styles.1a2b3c4d.css``.
+
+    :param str name: Original filename (may include a directory)
+    :param bytes data: Final file contents
+    :return: Fingerprinted filename
+    :rtype: str
+    """
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha1(data).hexdigest()[:8]}{ext}"
+
+
+def bundle(root, out_dir, inline_css=False):
+    """
+    Build a deployable bundle of the web interface.
+
+    Writes minified ``index.html`` plus either an inlined stylesheet or a
+    fingerprinted ``styles.<hash>.css``, fingerprinted copies of the lazily
+    loaded ``js/*.js`` feature modules and ``css/*.css`` panel styles
+    referenced by the shell, gzip copies
+    of every output and an ``asset-manifest.json``. code.py reads the manifest and serves the
+    fingerprinted files with ``Cache-Control: immutable``.
+
+    :param str root: Directory containing the source assets
+    :param str out_dir: Output directory (created if needed)
+    :param bool inline_css: Inline styles.css into index.html instead of fingerprinting it
+    :return: The manifest that was written
+    :rtype: dict
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(root, "index.html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(os.path.join(root, "styles.css"), encoding="utf-8") as f:
+        css = minify_css(f.read())
+
+    link = re.compile(r"""<link\s+rel=["']stylesheet["']\s+href=["']styles\.css["']\s*/?>""")
+    assets = {}
+    if inline_css:
+        html = link.sub(lambda _: f"<style>{css}</style>", html, count=1)
+    else:
+        css_bytes = css.encode("utf-8")
+        css_name = fingerprint_name("styles.css", css_bytes)
+        assets["styles.css"] = css_name
+        with open(os.path.join(out_dir, css_name), "wb") as f:
+            f.write(css_bytes)
+        html = link.sub(lambda _: f'<link rel="stylesheet" href="{css_name}">', html, count=1)
+
+    # Feature modules and their panel styles are referenced as
+    # 'js/<name>.js' / 'css/<name>.css' string literals in the shell's
+    # MODULES map - point each at its fingerprinted copy
+    for directory in ("js", "css"):
+        os.makedirs(os.path.join(out_dir, directory), exist_ok=True)
+    for module in sorted(set(re.findall(r"""["']((?:js/[\w.-]+\.js)|(?:css/[\w.-]+\.css))["']""", html))):
+        minify = minify_css if module.endswith(".css") else minify_js
+        with open(os.path.join(root, module), encoding="utf-8") as f:
+            module_bytes = minify(f.read()).encode("utf-8")
+        module_name = fingerprint_name(module, module_bytes)
+        assets[module] = module_name
+        with open(os.path.join(out_dir, module_name), "wb") as f:
+            f.write(module_bytes)
+        html = re.sub(r"""(["'])%s\1""" % re.escape(module),
+                      lambda m: m.group(1) + module_name + m.group(1), html)
+
+    # The service worker is served through a code.py route that prepends its
+    # version, so it is minified but keeps its name
+    if os.path.exists(os.path.join(root, "sw.js")):
+        with open(os.path.join(root, "sw.js"), encoding="utf-8") as f:
+            sw_bytes = minify_js(f.read()).encode("utf-8")
+        with open(os.path.join(out_dir, "sw.js"), "wb") as f:
+            f.write(sw_bytes)
+
+    html_bytes = minify_html(html).encode("utf-8")
+    with open(os.path.join(out_dir, "index.html"), "wb") as f:
+        f.write(html_bytes)
+
+    outputs = ["index.html"] + sorted(assets.values())
+    version = hashlib.sha1()
+    for name in outputs:
+        with open(os.path.join(out_dir, name), "rb") as f:
+            version.update(f.read())
+    manifest = {
+        "version": version.hexdigest()[:12],
+        "assets": assets,
+        "immutable": sorted(assets.values()),
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+    for name in outputs:
+        build_asset(os.path.join(out_dir, name))
+    return manifest
+
+
+# Samples that trip up naive minifiers: quotes and "//" inside regex
+# literals, comment markers inside strings, punctuation inside CSS strings.
+# Every (source, must survive) pair is checked in the bundled output.
+SELF_TEST_JS = """var quote = /'/g;
+var text = 'a    b // not a comment';
+var other = "x /* not a comment */ y";  // a comment
+var slashes = text.replace(/["']\\/\\//g, '');
+var ratio = 10 / 2 / 5; // division, not a regex
+function check(value) { return /[/'"]/.test(value) ? `line 1
+
+    indented // kept` : value / 2; }
+"""
+SELF_TEST_CSS = """a::after { content: "x ; y , z"; }  /* comment */
+q { quotes: "{ a }" ": b"; }
+"""
+SELF_TEST_EXPECT = [
+    ("js/sample.js", "var quote = /'/g;"),
+    ("js/sample.js", "'a    b // not a comment'"),
+    ("js/sample.js", '"x /* not a comment */ y"'),
+    ("js/sample.js", """/["']\\/\\//g"""),
+    ("js/sample.js", "var ratio = 10 / 2 / 5;"),
+    ("js/sample.js", "`line 1\n\n    indented // kept`"),
+    ("css/sample.css", 'content:"x ; y , z"'),
+    ("css/sample.css", 'quotes:"{ a }" ": b"'),
+    ("index.html", "var inline = /'/g;"),
+    ("index.html", "'c    d // e'"),
+]
+
+
+def self_test():
+    """
+    Bundle sample sources with tricky literals and check the output.
+
+    The bundled scripts are also syntax-checked with ``node --check`` when
+    Node.js is installed.
+
+    :return: Process exit status (1 if any check fails)
+    :rtype: int
+    """
+    failures = 0
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "js"))
+        os.makedirs(os.path.join(root, "css"))
+        samples = {
+            "index.html": ('<link rel="stylesheet" href="styles.css">\n<script>\n'
+                           "const MODULES = { sample: ['js/sample.js', 'css/sample.css'] };\n"
+                           "var inline = /'/g;\nvar inlineText = 'c    d // e';\n</script>\n"),
+            "styles.css": "body { color: red; }\n",
+            "js/sample.js": SELF_TEST_JS,
+            "css/sample.css": SELF_TEST_CSS,
+        }
+        for name, text in samples.items():
+            with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        out_dir = os.path.join(root, "dist")
+        manifest = bundle(root, out_dir)
+        outputs = {}
+        for name in ("index.html", "js/sample.js", "css/sample.css"):
+            with open(os.path.join(out_dir, manifest["assets"].get(name, name)), encoding="utf-8") as f:
+                outputs[name] = f.read()
+        for name, expected in SELF_TEST_EXPECT:
+            if expected in outputs[name]:
+                print(f"ok   {name}: {expected!r}")
+            else:
+                print(f"FAIL {name}: {expected!r} not in {outputs[name]!r}")
+                failures += 1
+        node = shutil.which("node")
+        if node:
+            script = os.path.join(out_dir, manifest["assets"]["js/sample.js"])
+            result = subprocess.run([node, "--check", script], capture_output=True, text=True)
+            if result.returncode:
+                print(f"FAIL js/sample.js is not valid JavaScript: {result.stderr.strip()}")
+                failures += 1
+            else:
+                print("ok   js/sample.js passes node --check")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    :param list argv: Arguments (defaults to sys.argv[1:])
+    :return: Process exit status
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="Build or verify precompressed Picowide assets.")
+    parser.add_argument("assets", nargs="*", default=DEFAULT_ASSETS,
+                        help="asset filenames relative to --root (default: index.html styles.css)")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(__file__), ".."),
+                        help="directory containing the assets (default: repository root)")
+    parser.add_argument("--check", action="store_true",
+                        help="only verify the .gz files, exit 1 if any is missing or stale")
+    parser.add_argument("--bundle", metavar="OUT_DIR",
+                        help="minify and fingerprint index.html/styles.css into OUT_DIR")
+    parser.add_argument("--inline-css", action="store_true",
+                        help="with --bundle, inline styles.css into index.html")
+    parser.add_argument("--self-test", action="store_true",
+                        help="bundle tricky sample sources and verify the minified output")
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return self_test()
+    if args.bundle and not args.check:
+        manifest = bundle(args.root, args.bundle, inline_css=args.inline_css)
+        for name in ["index.html"] + manifest["immutable"]:
+            path = os.path.join(args.bundle, name)
+            print(f"{name}: {os.path.getsize(path)} bytes, {os.path.getsize(path + '.gz')} gzipped")
+        print(f"{MANIFEST_NAME}: version {manifest['version']}")
+        print("Copy the contents of the output directory (including js/ and css/) to CIRCUITPY.")
+        return 0
+    if args.bundle:
+        # Verify the bundle's compressed copies instead of the sources
+        with open(os.path.join(args.bundle, MANIFEST_NAME), encoding="utf-8") as f:
+            args.assets = ["index.html"] + json.load(f)["immutable"]
+        args.root = args.bundle
+
+    status = 0
+    for asset in args.assets:
+        path = os.path.join(args.root, asset)
+        if args.check:
+            error = check_asset(path)
+            if error:
+                print(f"FAIL {error}")
+                status = 1
+            else:
+                print(f"ok   {asset}.gz")
+        else:
+            plain_size, compressed_size = build_asset(path)
+            saved = 100 - (compressed_size * 100 // plain_size) if plain_size else 0
+            print(f"{asset}: {plain_size} -> {compressed_size} bytes ({saved}% smaller)")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""
+Picowide - Host-side command line client
+
+Talks to a Picowide unit over its hotspot. ``sync`` makes a directory on
+the Pico match a project directory on your computer: it fetches the Pico's
+``/manifest`` (path, size, mtime and content hash of every file), compares
+it with the local files and transfers only what differs. All changed files
+go out as one tar archive to ``/import``; removed files are deleted with
+one ``/batch`` request. Re-deploying after a one-file change is a manifest
+download plus one small upload.
+
+Runs on the development computer (regular CPython), NOT on the Pico.
+Only the standard library is needed.
+
+Usage:
+    python tools/picowide.py sync my_project              # into / on the Pico
+    python tools/picowide.py sync my_project --remote /app --delete
+    python tools/picowide.py sync my_project --dry-run
+    python tools/picowide.py sync my_project --host 192.168.4.1 --exclude "*.md"
+
+Without ``--delete`` files that exist only on the Pico are left alone.
+Hidden files, ``__pycache__`` and ``boot_out.txt`` are never transferred
+or deleted.
+
+Author: Picowide Project
+License: MIT
+"""
+
+import argparse
+import binascii
+import fnmatch
+import hashlib
+import http.client
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import urllib.parse
+
+DEFAULT_HOST = "192.168.4.1"
+
+# Basename patterns never synced in either direction
+DEFAULT_EXCLUDES = [".*", "__pycache__", "boot_out.txt"]
+
+
+def http_request(host, method, path, body=None, headers=None, timeout=30):
+    """
+    Send one request to the Pico.
+
+    The Pico closes the connection after every response, so each request
+    uses a new connection.
+
+    :param str host: Host name or address, optionally with ":port"
+    :param str method: HTTP method
+    :param str path: Request path including the query string
+    :param bytes body: Request body
+    :param dict headers: Request headers
+    :param float timeout: Socket timeout in seconds
+    :return: The open response; read it before the next request
+    :rtype: http.client.HTTPResponse
+    """
+    connection = http.client.HTTPConnection(host, timeout=timeout)
+    connection.request(method, path, body=body, headers=headers or {})
+    return connection.getresponse()
+
+
+def is_excluded(name, excludes):
+    """
+    Check a file or directory name against the exclude patterns.
+
+    :param str name: Basename
+    :param list excludes: fnmatch patterns
+    :rtype: bool
+    """
+    return any(fnmatch.fnmatch(name, pattern) for pattern in excludes)
+
+
+def is_excluded_path(relative_path, excludes):
+    """
+    Check every component of a relative path against the exclude patterns.
+
+    :param str relative_path: Path with "/" separators
+    :param list excludes: fnmatch patterns
+    :rtype: bool
+    """
+    return any(is_excluded(part, excludes) for part in relative_path.split("/"))
+
+
+def fetch_manifest(host, remote, excludes, timeout=30):
+    """
+    Download the Pico's manifest of a directory.
+
+    :param str host: Pico address
+    :param str remote: Directory on the Pico
+    :param list excludes: fnmatch patterns of names to leave out
+    :param float timeout: Socket timeout in seconds
+    :return: Tuple of (hash algorithm, {relative path: manifest entry})
+    :rtype: tuple[str, dict]
+    :raises RuntimeError: If the Pico reports an error
+    """
+    response = http_request(host, "GET", "/manifest?path=" + urllib.parse.quote(remote), timeout=timeout)
+    data = response.read()
+    if response.status != 200 or not data.startswith(b"["):
+        raise RuntimeError(data.decode("utf-8", "replace").strip() or f"HTTP {response.status}")
+    prefix = remote.rstrip("/") + "/"
+    entries = {}
+    for entry in json.loads(data):
+        relative = entry["name"][len(prefix):]
+        if not is_excluded_path(relative, excludes):
+            entries[relative] = entry
+    return response.getheader("X-Content-Hash-Algorithm", "sha1"), entries
+
+
+def scan_local(root, excludes):
+    """
+    List the files and directories of the local project.
+
+    :param str root: Local project directory
+    :param list excludes: fnmatch patterns of names to leave out
+    :return: Tuple of ({relative path: local path} for files, set of
+        relative directory paths)
+    :rtype: tuple[dict, set]
+    """
+    files, directories = {}, set()
+    for directory, subdirs, names in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if not is_excluded(d, excludes))
+        relative_dir = os.path.relpath(directory, root).replace(os.sep, "/")
+        relative_dir = "" if relative_dir == "." else relative_dir + "/"
+        for d in subdirs:
+            directories.add(relative_dir + d)
+        for name in sorted(names):
+            if not is_excluded(name, excludes):
+                files[relative_dir + name] = os.path.join(directory, name)
+    return files, directories
+
+
+def content_hash(path, algorithm):
+    """
+    Hash a local file the way the Pico does.
+
+    :param str path: Local file
+    :param str algorithm: "sha1" or "crc32", from X-Content-Hash-Algorithm
+    :return: Hex digest (CRC32 as 8 big-endian hex digits)
+    :rtype: str
+    """
+    with open(path, "rb") as f:
+        if algorithm == "crc32":
+            crc = 0
+            for block in iter(lambda: f.read(65536), b""):
+                crc = binascii.crc32(block, crc)
+            return crc.to_bytes(4, "big").hex()
+        hasher = hashlib.new(algorithm)
+        for block in iter(lambda: f.read(65536), b""):
+            hasher.update(block)
+        return hasher.hexdigest()
+
+
+def plan_sync(local_files, local_dirs, remote, algorithm):
+    """
+    Work out which files to send and which to delete.
+
+    Local files are only hashed when their size matches the Pico's copy;
+    a different size already means the file changed.
+
+    :param dict local_files: From scan_local()
+    :param set local_dirs: From scan_local()
+    :param dict remote: From fetch_manifest()
+    :param str algorithm: Hash algorithm of the manifest
+    :return: Tuple of (relative paths to send, relative paths only on the
+        Pico in deletion order: files first, then directories deepest first)
+    :rtype: tuple[list, list]
+    """
+    send = []
+    for relative, path in local_files.items():
+        entry = remote.get(relative)
+        if (entry is None or entry["type"] != "file" or entry["size"] != os.path.getsize(path)
+                or entry.get("hash") != content_hash(path, algorithm)):
+            send.append(relative)
+    extra_files = [r for r, e in remote.items() if e["type"] == "file" and r not in local_files]
+    extra_dirs = [r for r, e in remote.items() if e["type"] == "directory" and r not in local_dirs]
+    extra_dirs.sort(key=lambda r: r.count("/"), reverse=True)
+    return send, extra_files + extra_dirs
+
+
+def build_archive(local_files, names, remote):
+    """
+    Pack files into an in-memory tar for /import.
+
+    Entry names include the remote directory, so the archive is imported
+    into "/" and the Pico creates any missing directories.
+
+    :param dict local_files: From scan_local()
+    :param list names: Relative paths to include
+    :param str remote: Directory on the Pico
+    :return: The archive
+    :rtype: bytes
+    """
+    prefix = remote.strip("/")
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        for relative in names:
+            tar.add(local_files[relative], arcname=f"{prefix}/{relative}" if prefix else relative,
+                    recursive=False)
+    return buffer.getvalue()
+
+
+def push_archive(host, archive, timeout=30):
+    """
+    Upload an archive to /import, printing the Pico's per-file report.
+
+    :param str host: Pico address
+    :param bytes archive: From build_archive()
+    :param float timeout: Socket timeout in seconds
+    :return: True if the Pico extracted everything without an error
+    :rtype: bool
+    """
+    response = http_request(host, "POST", "/import?path=/", body=archive, timeout=timeout,
+                            headers={"Content-Type": "application/x-tar"})
+    ok = response.status == 200
+    for line in response:
+        line = line.decode("utf-8", "replace").rstrip("\n")
+        print(f"  {line}")
+        if line.startswith("Error"):
+            ok = False
+    return ok
+
+
+def delete_remote(host, paths, timeout=30):
+    """
+    Delete files and (empty) directories on the Pico in one /batch request.
+
+    :param str host: Pico address
+    :param list paths: Absolute paths in deletion order
+    :param float timeout: Socket timeout in seconds
+    :return: True if every deletion succeeded
+    :rtype: bool
+    """
+    body = json.dumps({"operations": [{"op": "delete", "path": path} for path in paths]}).encode()
+    response = http_request(host, "POST", "/batch", body=body, timeout=timeout,
+                            headers={"Content-Type": "application/json"})
+    ok = response.status == 200
+    for line in response:
+        line = line.decode("utf-8", "replace").rstrip("\n")
+        if line.startswith("ok "):
+            print(f"  {line.split(' ', 2)[2]}")
+        elif not line.startswith("#"):
+            print(f"  FAIL {line}")
+            ok = False
+    return ok
+
+
+def sync(args):
+    """
+    Make a directory on the Pico match a local directory.
+
+    :param argparse.Namespace args: Parsed "sync" arguments
+    :return: Process exit status
+    :rtype: int
+    """
+    started = time.monotonic()
+    remote = "/" + args.remote.strip("/")
+    excludes = DEFAULT_EXCLUDES + args.exclude
+    if not os.path.isdir(args.local):
+        print(f"{args.local} is not a directory")
+        return 2
+
+    local_files, local_dirs = scan_local(args.local, excludes)
+    try:
+        algorithm, remote_entries = fetch_manifest(args.host, remote, excludes, args.timeout)
+    except RuntimeError as e:
+        if not str(e).startswith("Error: No such directory"):
+            print(f"Could not read the manifest of {remote}: {e}")
+            return 1
+        algorithm, remote_entries = "sha1", {}  # /import creates it
+    except OSError as e:
+        print(f"Could not reach Picowide at {args.host}: {e}")
+        return 1
+
+    send, extra = plan_sync(local_files, local_dirs, remote_entries, algorithm)
+    delete = extra if args.delete else []
+    prefix = remote.rstrip("/") + "/"
+    if args.dry_run:
+        for relative in send:
+            print(f"  send   {prefix}{relative}")
+        for relative in delete:
+            print(f"  delete {prefix}{relative}")
+    ok = True
+    if send and not args.dry_run:
+        archive = build_archive(local_files, send, remote)
+        print(f"Sending {len(send)} file(s), {len(archive)} bytes")
+        ok = push_archive(args.host, archive, args.timeout)
+    if delete and not args.dry_run and ok:
+        print(f"Deleting {len(delete)} path(s) not in {args.local}")
+        ok = delete_remote(args.host, [prefix + relative for relative in delete], args.timeout)
+
+    unchanged = len(local_files) - len(send)
+    summary = f"{len(send)} changed, {len(delete)} deleted, {unchanged} unchanged"
+    if extra and not args.delete:
+        summary += f", {len(extra)} only on the Pico (use --delete to remove)"
+    print(f"{'Would sync' if args.dry_run else 'Synced'} {args.local} -> {remote}: {summary}"
+          f" in {time.monotonic() - started:.1f}s")
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    :param list argv: Arguments (defaults to sys.argv[1:])
+    :return: Process exit status
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description="Command line client for a Picowide unit.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"address of the Pico, optionally with :port (default: {DEFAULT_HOST})")
+    parser.add_argument("--timeout", type=float, default=30,
+                        help="socket timeout in seconds (default: 30)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="copy a local directory to the Pico, sending only changes")
+    sync_parser.add_argument("local", help="local project directory")
+    sync_parser.add_argument("--remote", default="/",
+                             help="directory on the Pico (default: /)")
+    sync_parser.add_argument("--delete", action="store_true",
+                             help="also delete files on the Pico that are not in the local directory")
+    sync_parser.add_argument("--dry-run", action="store_true",
+                             help="only show what would be sent and deleted")
+    sync_parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                             help="skip files and directories matching this name pattern (repeatable)")
+    args = parser.parse_args(argv)
+    return sync(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())